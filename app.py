@@ -1,109 +1,34 @@
 import streamlit as st
 import pandas as pd
-import numpy as np
 import plotly.express as px
 import plotly.graph_objects as go
-from datetime import datetime, timedelta
-import pickle
 import os
 
+from dashboard.alerts import current_alerts
+from dashboard.data import dataset_version, load_sales_data
+from dashboard.export import (available_formats, export_mime, export_view, load_export_pool,
+                              missing_libraries)
+from dashboard.cube import load_cube, load_cube_index, rollup
+from dashboard.filters import load_filter_index, selection_key
+from dashboard.forecast import load_forecast_model
+from dashboard.kpis import load_kpis
+from dashboard.runner import session_runner
+from dashboard.periods import GRANULARITIES, PERIOD_KEYS, bucket_totals, from_month_keys, month_keys, period_labels
+from dashboard.table import paged_table
+from dashboard.weather import WEATHER_MEASURES, load_weather, load_weather_correlations, load_weather_moments, weather_stamp
+
 # Ensure data directory exists
 os.makedirs('data', exist_ok=True)
 
 # Page configuration
 st.set_page_config(page_title="Maize Distribution Analytics", layout="wide")
 
-# Create customer data
-def generate_customer_base():
-    local_customers = [
-        "Metro Wholesale Ltd", "City Bulk Foods", "Region Foods Co", 
-        "Prime Distributors", "Local Grain Exchange", "Urban Bulk Supplies",
-        "District Foods Inc", "Central Wholesale Co", "Town Grain Traders",
-        "Municipal Food Supply", "Community Bulk Store", "Local Mart Chain",
-        "City Food Network", "Regional Bulk Foods", "Metro Food Alliance"
-    ]
-    
-    international_customers = [
-        "Global Grain Corp", "International Food Trade", "World Maize Exchange",
-        "Continental Supplies", "Ocean Foods International", "Cross Border Trading",
-        "Global Bulk Foods", "International Wholesale Co", "World Food Network",
-        "Maritime Traders Inc", "Export Trading Group", "Global Food Alliance",
-        "International Grain Co", "Overseas Food Supply", "World Trade Foods"
-    ]
-    
-    online_customers = [
-        "E-Grain Trading", "Digital Food Exchange", "Online Bulk Foods",
-        "Virtual Trading Co", "E-Commerce Foods", "Digital Wholesale Network",
-        "Cloud Trading Group", "Online Mart Supply", "Digital Food Alliance",
-        "E-Bulk Solutions", "Virtual Food Trade", "Online Exchange Co",
-        "Digital Grain Store", "E-Commerce Trades", "Web Food Network"
-    ]
-    
-    customers_data = []
-    for customer in local_customers:
-        customers_data.append({"name": customer, "category": "Local"})
-    for customer in international_customers:
-        customers_data.append({"name": customer, "category": "International"})
-    for customer in online_customers:
-        customers_data.append({"name": customer, "category": "Online"})
-    
-    return pd.DataFrame(customers_data)
-
-# Generate dummy data
-def generate_dummy_data(n_records=5000):
-    np.random.seed(42)
-    
-    # Generate customer base
-    customers_df = generate_customer_base()
-    
-    # Date range for last 3 years
-    end_date = datetime.now()
-    start_date = end_date - timedelta(days=1095)
-    dates = pd.date_range(start=start_date, end=end_date, periods=n_records)
-    
-    # Create dummy data
-    data = {
-        'date': dates,
-        'product_type': np.random.choice(['White Maize', 'Yellow Maize', 'Organic Maize'], n_records),
-        'region': np.random.choice(['North', 'South', 'East', 'West'], n_records),
-        'quantity_tons': np.random.normal(100, 20, n_records),
-        'price_per_ton': np.random.normal(300, 50, n_records),
-    }
-    
-    # Randomly assign customers and their categories
-    customer_indices = np.random.choice(len(customers_df), n_records)
-    data['customer_name'] = customers_df.iloc[customer_indices]['name'].values
-    data['customer_category'] = customers_df.iloc[customer_indices]['category'].values
-    
-    df = pd.DataFrame(data)
-    
-    # Calculate revenue
-    df['revenue'] = df['quantity_tons'] * df['price_per_ton']
-    
-    # Add yearly growth trend (5% year over year)
-    df['years_from_start'] = (df['date'] - df['date'].min()).dt.days / 365
-    df['growth_factor'] = 1 + (df['years_from_start'] * 0.05)
-    df['revenue'] = df['revenue'] * df['growth_factor']
-    
-    # Add seasonal patterns
-    df['month'] = df['date'].dt.month
-    df['year'] = df['date'].dt.year
-    seasonal_factor = np.sin(df['month'] * np.pi / 6) * 0.2 + 1
-    df['revenue'] = df['revenue'] * seasonal_factor
-    
-    # Add active/inactive status (90% active, 10% inactive)
-    df['status'] = np.random.choice(['Active', 'Inactive'], n_records, p=[0.9, 0.1])
-    
-    # Simulate a major customer loss scenario
-    target_customer = "Global Grain Corp"
-    mask = (df['customer_name'] == target_customer) & (df['date'] > (end_date - timedelta(days=180)))
-    df.loc[mask, 'revenue'] = df.loc[mask, 'revenue'] * 0.3
-    df.loc[mask, 'status'] = 'Inactive'
-    
-    return df.drop(['years_from_start', 'growth_factor'], axis=1)
-
-# Generate data
-df = generate_dummy_data()
+# Load data (built once per process, shared by all sessions)
+data_version = dataset_version()
+df = load_sales_data(version=data_version)
+cube = load_cube(data_version, df)
+filter_index = load_cube_index(data_version, cube)
+active_plugins = st.session_state.get('plugin_config', {}).get('active_plugins', [])
 
 # Dashboard header
 st.title("🌽 Maize Distribution Analytics")
@@ -121,7 +46,7 @@ if st.sidebar.button("Clear All Filters"):
 filter_col1, filter_col2 = st.sidebar.columns(2)
 
 with filter_col1:
-    year_options = sorted(df['year'].unique())
+    year_options = filter_index.values['year']
     selected_years = st.multiselect('Select Years', year_options, 
                                   default=year_options[-1:],
                                   key='year_filter')
@@ -134,49 +59,52 @@ with filter_col2:
     selected_month = st.selectbox('Select Month', ['All'] + month_options_named)
 
 # Other filters
-customer_options = sorted(df['customer_name'].unique())
+customer_options = filter_index.values['customer_name']
 selected_customers = st.sidebar.multiselect('Select Customers', customer_options, default=[])
 
-category_options = sorted(df['customer_category'].unique())
+category_options = filter_index.values['customer_category']
 selected_categories = st.sidebar.selectbox('Select Customer Category', 
                                          ['All'] + list(category_options))
 
-region_options = sorted(df['region'].unique())
+region_options = filter_index.values['region']
 selected_region = st.sidebar.selectbox('Select Region', ['All'] + list(region_options))
 
-product_options = sorted(df['product_type'].unique())
+product_options = filter_index.values['product_type']
 selected_product = st.sidebar.selectbox('Select Product', ['All'] + list(product_options))
 
-status_options = sorted(df['status'].unique())
+status_options = filter_index.values['status']
 selected_status = st.sidebar.selectbox('Select Status', ['All'] + list(status_options))
 
-# Filter logic
-mask = df['year'].isin(selected_years)
+# Filter logic: resolve the selection against the prebuilt bitmaps of the
+# monthly cube; every chart below is answered from the sliced cube
+selection = {'year': selected_years}
 
 if selected_month != 'All':
     selected_month_num = list(month_names.keys())[list(month_names.values()).index(selected_month)]
-    mask = mask & (df['month'] == selected_month_num)
+    selection['month'] = [selected_month_num]
 
 if selected_customers:
-    mask = mask & df['customer_name'].isin(selected_customers)
+    selection['customer_name'] = selected_customers
 if selected_categories != 'All':
-    mask = mask & (df['customer_category'] == selected_categories)
+    selection['customer_category'] = [selected_categories]
 if selected_region != 'All':
-    mask = mask & (df['region'] == selected_region)
+    selection['region'] = [selected_region]
 if selected_product != 'All':
-    mask = mask & (df['product_type'] == selected_product)
+    selection['product_type'] = [selected_product]
 if selected_status != 'All':
-    mask = mask & (df['status'] == selected_status)
+    selection['status'] = [selected_status]
 
-df_filtered = df[mask]
+cube_filtered = filter_index.filter(cube, selection)
 
 # Top-level metrics
 col1, col2, col3, col4 = st.columns(4)
 
-total_revenue = df_filtered['revenue'].sum()
-avg_order_size = df_filtered['quantity_tons'].mean()
-total_volume = df_filtered['quantity_tons'].sum()
-active_customers = df_filtered[df_filtered['status'] == 'Active']['customer_name'].nunique()
+# All four metrics in one pass over the selected cube rows, memoised per selection
+kpis = load_kpis(data_version, selection_key(selection), cube, filter_index)
+total_revenue = kpis['total_revenue']
+total_volume = kpis['total_volume']
+avg_order_size = kpis['avg_order_size']
+active_customers = kpis['active_customers']
 
 with col1:
     st.metric("Total Revenue", f"${total_revenue:,.0f}")
@@ -193,7 +121,22 @@ st.markdown("---")
 
 # Revenue Trend - Full Width
 st.subheader("Revenue Trend")
-monthly_revenue = df_filtered.groupby(df_filtered['date'].dt.strftime('%Y-%m'))[['revenue']].sum().reset_index()
+granularity = st.radio('Granularity', GRANULARITIES, index=GRANULARITIES.index('Month'),
+                       horizontal=True, label_visibility='collapsed')
+
+# Month, quarter and year buckets come from the cube; weeks need the order
+# rows, which are selected through the raw-data bitmap index
+if granularity == 'Week':
+    order_index = load_filter_index(data_version, df)
+    rows = order_index.select(selection)
+    period_keys, period_revenue = bucket_totals(df[PERIOD_KEYS['Week']].to_numpy()[rows],
+                                                df['revenue'].to_numpy()[rows])
+else:
+    cube_month_keys = month_keys(cube_filtered['year'], cube_filtered['month'])
+    period_keys, period_revenue = bucket_totals(from_month_keys(cube_month_keys, granularity),
+                                                cube_filtered['revenue'])
+monthly_revenue = pd.DataFrame({'date': period_labels(period_keys, granularity),
+                                'revenue': period_revenue})
 
 # Enhanced line chart with markers and values
 fig_revenue = go.Figure()
@@ -201,16 +144,32 @@ fig_revenue.add_trace(go.Scatter(
     x=monthly_revenue['date'],
     y=monthly_revenue['revenue'],
     mode='lines+markers+text',
-    text=monthly_revenue['revenue'].apply(lambda x: f'${x:,.0f}'),
+    name='Revenue',
+    texttemplate='$%{y:,.0f}',  # Formatted by Plotly in the browser
     textposition='top center',
     textfont=dict(size=8),  # Smaller text size
     line=dict(width=2),
     marker=dict(size=8)
 ))
 
+# Predictive Sales Analysis: continue the monthly trend with the forecast for
+# the selected customers, products, regions and statuses
+if ('predictive_analysis' in active_plugins and granularity == 'Month' and selected_month == 'All'
+        and year_options[-1] in selected_years):
+    forecast_model = load_forecast_model(data_version, cube)
+    forecast_keys, forecast_revenue = forecast_model.forecast(forecast_model.select(selection))
+    fig_revenue.add_trace(go.Scatter(
+        x=period_labels(forecast_keys, 'Month'),
+        y=forecast_revenue,
+        mode='lines+markers',
+        name='Forecast',
+        line=dict(width=2, dash='dash'),
+        marker=dict(size=6)
+    ))
+
 fig_revenue.update_layout(
-    title='Monthly Revenue Trend',
-    xaxis_title='Month',
+    title=f'Revenue Trend by {granularity}',
+    xaxis_title=granularity,
     yaxis_title='Revenue ($)',
     template='plotly_white',
     height=500,  # Increased height
@@ -226,7 +185,7 @@ col1, col2 = st.columns(2)
 
 with col1:
     st.subheader("Regional Performance")
-    region_performance = df_filtered.groupby('region')[['revenue']].sum().reset_index()
+    region_performance = rollup(cube_filtered, ['region'], ['revenue'])
     fig_region = px.bar(region_performance, x='region', y='revenue',
                        title='Revenue by Region',
                        labels={'region': 'Region', 'revenue': 'Revenue ($)'},
@@ -236,7 +195,7 @@ with col1:
 
 with col2:
     st.subheader("Customer Category Distribution")
-    category_dist = df_filtered.groupby('customer_category')['revenue'].sum().reset_index()
+    category_dist = rollup(cube_filtered, ['customer_category'], ['revenue'])
     fig_category = px.pie(category_dist, values='revenue', names='customer_category',
                          title='Revenue by Customer Category',
                          template='plotly_white',
@@ -248,53 +207,119 @@ col3, col4 = st.columns(2)
 
 with col3:
     st.subheader("Product Mix")
-    product_mix = df_filtered.groupby('product_type')['quantity_tons'].sum().reset_index()
+    product_mix = rollup(cube_filtered, ['product_type'], ['quantity_tons'])
     fig_product = px.pie(product_mix, values='quantity_tons', names='product_type',
                         title='Sales Volume by Product Type',
                         template='plotly_white',
                         height=400)
     st.plotly_chart(fig_product, use_container_width=True)
 
+# Weather Data Integration: correlation of order revenue with the weather on
+# the order date, per region, for the selected years
+if 'weather_data' in active_plugins:
+    with col4:
+        st.subheader("Weather Correlation")
+        weather = load_weather(region_options, pd.Timestamp(int(year_options[0]), 1, 1), df['date'].max())
+        stamp = weather_stamp()
+        moments = load_weather_moments(data_version, stamp, df, weather)
+        correlations = load_weather_correlations(data_version, stamp, tuple(sorted(selected_years)), moments)
+        fig_weather = px.bar(correlations.melt(id_vars='Region', value_vars=list(WEATHER_MEASURES.values()),
+                                               var_name='Measure', value_name='Correlation'),
+                             x='Region', y='Correlation', color='Measure', barmode='group',
+                             title='Revenue vs Weather on Order Date',
+                             template='plotly_white',
+                             height=400)
+        fig_weather.update_yaxes(range=[-1, 1])
+        st.plotly_chart(fig_weather, use_container_width=True)
+
 # Customer table with filtered data
 st.markdown("---")
 st.subheader("Full Data Table")
 
-# Create filtered customer table using the same filtered dataset
-customer_table = df_filtered.groupby(['customer_name', 'customer_category', 'region', 'status']).\
-    agg({
-        'revenue': 'sum',
-        'quantity_tons': 'sum'
-    }).reset_index()
+# Create filtered customer table from the same slice of the cube
+customer_table = rollup(cube_filtered, ['customer_name', 'customer_category', 'region', 'status'],
+                        ['revenue', 'quantity_tons'])
 
-customer_table = customer_table.sort_values('revenue', ascending=False)
 customer_table['revenue'] = customer_table['revenue'].round(2)
 customer_table['quantity_tons'] = customer_table['quantity_tons'].round(2)
 
-# Format revenue as currency
-customer_table['revenue'] = customer_table['revenue'].apply(lambda x: f"${x:,.2f}")
-
 # Rename columns for better presentation
 customer_table.columns = ['Customer Name', 'Category', 'Region', 'Status', 'Revenue', 'Volume (Tons)']
 
-st.dataframe(customer_table, use_container_width=True)
-
-# Save the dataframe to pickle for other pages to use
-data_to_save = {
-    'original_df': df,
-    'filtered_df': df_filtered,
-    'filter_state': {
-        'selected_years': selected_years,
-        'selected_month': selected_month,
-        'selected_customers': selected_customers,
-        'selected_categories': selected_categories,
-        'selected_region': selected_region,
-        'selected_product': selected_product,
-        'selected_status': selected_status
-    }
+# Sorted, searched and paged server-side; revenue stays numeric and only the
+# visible page is formatted as currency
+paged_table(customer_table, key='customer_table',
+            search_columns=['Customer Name', 'Category', 'Region', 'Status'],
+            formats={'Revenue': '${:,.2f}'},
+            default_sort='Revenue')
+
+# Export the filtered orders. The file is written in the background, so the
+# session stays interactive; the download appears once it is complete.
+st.markdown("---")
+st.subheader("Export")
+export_formats = available_formats(active_plugins)
+export_runner = session_runner('export_runner', load_export_pool())
+
+export_col1, export_col2 = st.columns([1, 3])
+with export_col1:
+    export_format = st.selectbox('Format', export_formats, label_visibility='collapsed')
+with export_col2:
+    if st.button("Export filtered orders"):
+        order_rows = load_filter_index(data_version, df).select(selection)
+        export_summary = {
+            'Total Revenue': f"${total_revenue:,.0f}",
+            'Total Volume (Tons)': f"{total_volume:,.0f}",
+            'Active Customers': active_customers,
+        }
+        export_runner.submit((data_version, selection_key(selection), export_format), export_view,
+                             export_format, df, order_rows, "Maize Distribution Orders", export_summary)
+if not {'export_excel', 'pdf_reports'} <= set(active_plugins):
+    st.caption("Activate the Advanced Excel Export and PDF Report Generator plugins for Excel and PDF exports.")
+for missing_format, library in missing_libraries(active_plugins).items():
+    st.caption(f"{missing_format} export needs the {library} package, which is not installed.")
+
+# Polls while the export runs, then reruns the page once to offer the file
+def export_status(job, was_running):
+    if not job.done():
+        st.progress(min(job.progress, 1.0), text=job.message or "Exporting...")
+    elif was_running:
+        st.rerun()
+    else:
+        try:
+            path = job.result()
+        except Exception as e:
+            st.error(f"Export failed: {e}")
+            return
+        with open(path, 'rb') as f:
+            st.download_button(f"Download {os.path.basename(path)}", f, file_name=os.path.basename(path),
+                               mime=export_mime(job.key[2]))
+
+export_job = export_runner.job
+if export_job is not None:
+    export_running = not export_job.done()
+    st.fragment(export_status, run_every=1 if export_running else None)(export_job, export_running)
+
+# Keep this session's filter selection for the other pages; the bulk data
+# lives in the shared store and is never copied per session
+st.session_state.filter_state = {
+    'selected_years': selected_years,
+    'selected_month': selected_month,
+    'selected_customers': selected_customers,
+    'selected_categories': selected_categories,
+    'selected_region': selected_region,
+    'selected_product': selected_product,
+    'selected_status': selected_status
 }
 
-with open('data/dashboard_data.pkl', 'wb') as f:
-    pickle.dump(data_to_save, f)
+# Revenue-drop alerts from the Custom Notifications plugin
+if 'custom_notifications' in active_plugins:
+    alerts = current_alerts(data_version, lambda: df)
+    st.sidebar.markdown("---")
+    st.sidebar.subheader(f"🔔 Alerts ({len(alerts)})")
+    for alert in alerts.head(5).to_dict('records'):
+        st.sidebar.warning(f"{alert['Type']} **{alert['Name']}**: revenue {alert['Change (%)']:+.0f}% ({alert['Window']})")
+    if len(alerts) > 5:
+        st.sidebar.caption(f"{len(alerts) - 5} more; adjust the threshold under Admin Settings")
 
 # Add a note about the data
 st.sidebar.markdown("---")
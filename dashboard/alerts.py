@@ -0,0 +1,79 @@
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from dashboard.cube import read_cube
+from dashboard.periods import period_labels
+from dashboard.ranking import load_leaderboards
+
+# Revenue-drop alerts for the Custom Notifications plugin. Each rule compares
+# a value's revenue over the last `window` complete months with the `window`
+# months before that and fires when it fell by at least `threshold` percent.
+# Window totals come from the leaderboards' prefix sums, which are kept up to
+# date incrementally as orders are ingested, so evaluating a rule set costs a
+# few array differences per dimension and never touches the order history.
+ALERT_DIMENSIONS = {'customer_name': 'Customer', 'region': 'Region'}
+DEFAULT_THRESHOLD = 20
+DEFAULT_WINDOW_MONTHS = 6
+
+# value=None applies the rule to every value of the dimension
+AlertRule = namedtuple('AlertRule', ['dimension', 'threshold', 'value', 'window'],
+                       defaults=[None, DEFAULT_WINDOW_MONTHS])
+
+ALERT_COLUMNS = ['Type', 'Name', 'Previous Revenue', 'Recent Revenue', 'Change (%)', 'Threshold (%)', 'Window']
+
+def default_rules(threshold=DEFAULT_THRESHOLD, window=DEFAULT_WINDOW_MONTHS):
+    return tuple(AlertRule(dim, threshold, window=window) for dim in ALERT_DIMENSIONS)
+
+# Triggered alerts, biggest drop first. The month with the latest orders is
+# treated as incomplete, so windows end at the month before it.
+def evaluate_alerts(boards, rules, end_key=None):
+    if boards.last_key is None:
+        return pd.DataFrame(columns=ALERT_COLUMNS)
+    end_key = boards.last_key - 1 if end_key is None else end_key
+    windows = {}
+    positions = {}
+    alerts = []
+    for rule in rules:
+        if (rule.dimension, rule.window) not in windows:
+            recent = boards.totals(rule.dimension, end_key - rule.window + 1, end_key)[0]
+            previous = boards.totals(rule.dimension, end_key - 2 * rule.window + 1, end_key - rule.window)[0]
+            with np.errstate(divide='ignore', invalid='ignore'):
+                change = np.where(previous > 0, recent / previous - 1, np.nan) * 100
+            first, last = period_labels(np.array([end_key - rule.window + 1, end_key]), 'Month')
+            windows[rule.dimension, rule.window] = recent, previous, change, f'{first} - {last}'
+        recent, previous, change, label = windows[rule.dimension, rule.window]
+        if rule.value is None:
+            hits = np.flatnonzero(change <= -rule.threshold)
+        else:
+            if rule.dimension not in positions:
+                positions[rule.dimension] = {v: i for i, v in enumerate(boards.values[rule.dimension])}
+            i = positions[rule.dimension].get(rule.value)
+            hits = [i] if i is not None and change[i] <= -rule.threshold else []
+        for i in hits:
+            alerts.append((ALERT_DIMENSIONS.get(rule.dimension, rule.dimension), boards.values[rule.dimension][i],
+                           previous[i], recent[i], change[i], rule.threshold, label))
+    table = pd.DataFrame(alerts, columns=ALERT_COLUMNS)
+    # A value matched by several rules is reported once, at its tightest threshold
+    table = table.sort_values(['Change (%)', 'Threshold (%)'], ignore_index=True)
+    return table.drop_duplicates(['Type', 'Name', 'Window'], ignore_index=True)
+
+# Evaluated once per data version and rule set
+@st.cache_data(show_spinner=False, max_entries=64)
+def load_alerts(version, rules, _boards):
+    return evaluate_alerts(_boards, rules)
+
+# The alert settings chosen on the Admin page for this session
+def session_rules():
+    settings = st.session_state.get('alert_settings', {})
+    return default_rules(settings.get('threshold', DEFAULT_THRESHOLD),
+                         settings.get('window', DEFAULT_WINDOW_MONTHS))
+
+# Alerts for a data version under this session's rules. The leaderboards
+# behind them are advanced from the parts ingested since the last version;
+# load_df() is only called when the version's cube was never stored.
+def current_alerts(version, load_df, rules=None):
+    boards = load_leaderboards(version, read_cube(version, load_df))
+    return load_alerts(version, rules or session_rules(), boards)
@@ -0,0 +1,160 @@
+import streamlit as st
+import numpy as np
+import pandas as pd
+
+from dashboard.downsample import downsample_frame
+
+# Define major competitors with their characteristics. price_cut describes a
+# strategic price reduction from a given date on.
+COMPETITORS = {
+    'MaizeCorp Elite': {
+        'base_price': 290,
+        'price_strategy': 'Premium',
+        'service_quality': 9.2,
+        'target_customers': ['Global Grain Corp', 'International Food Trade'],
+        'price_cut': {'from': '2023-09-01', 'pct': 0.15}
+    },
+    'GrainGiants Int': {
+        'base_price': 275,
+        'price_strategy': 'Aggressive',
+        'service_quality': 8.5,
+        'target_customers': ['Maritime Traders Inc', 'Export Trading Group'],
+        'price_cut': {'from': '2023-09-01', 'pct': 0.15}
+    },
+    'AgriGlobal Pro': {
+        'base_price': 285,
+        'price_strategy': 'Balanced',
+        'service_quality': 8.8,
+        'target_customers': ['World Food Network', 'Continental Supplies']
+    },
+    'FarmFresh Hub': {
+        'base_price': 270,
+        'price_strategy': 'Economy',
+        'service_quality': 8.0,
+        'target_customers': ['Local Grain Exchange', 'Urban Bulk Supplies']
+    },
+    'EcoGrain Plus': {
+        'base_price': 295,
+        'price_strategy': 'Organic Focus',
+        'service_quality': 9.0,
+        'target_customers': ['Digital Food Exchange', 'E-Commerce Foods']
+    }
+}
+
+# Define customer movement events
+CUSTOMER_MOVEMENTS = {
+    'Global Grain Corp': {
+        'new_supplier': 'MaizeCorp Elite',
+        'date': '2024-01-15',
+        'reason': 'Price advantage: 15% lower with bulk commitment',
+        'impact': 'High',
+        'annual_value': '$2.5M'
+    },
+    'International Food Trade': {
+        'new_supplier': 'GrainGiants Int',
+        'date': '2023-09-01',
+        'reason': 'Aggressive pricing and flexible payment terms',
+        'impact': 'Medium',
+        'annual_value': '$1.8M'
+    },
+    'Maritime Traders Inc': {
+        'new_supplier': 'AgriGlobal Pro',
+        'date': '2024-02-01',
+        'reason': 'Integrated logistics solution',
+        'impact': 'Medium',
+        'annual_value': '$1.2M'
+    },
+    'Export Trading Group': {
+        'new_supplier': 'FarmFresh Hub',
+        'date': '2023-11-15',
+        'reason': 'Regional warehouse access and lower prices',
+        'impact': 'High',
+        'annual_value': '$2.1M'
+    }
+}
+
+# Generate competitor data over the date range of the main data. The whole
+# (date x competitor) grid is built with array operations, so the cost is a
+# few vectorised passes whatever the number of competitors or the frequency
+# ('ME' for month ends, 'D' for daily prices).
+def generate_competitor_data(main_df, freq='ME', seed=42, competitors=COMPETITORS,
+                             customer_movements=CUSTOMER_MOVEMENTS):
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range(start=main_df['date'].min(), end=main_df['date'].max(), freq=freq)
+    names = list(competitors)
+    n_dates, n_competitors = len(dates), len(names)
+
+    # Per-competitor parameters as (1, n_competitors) rows
+    base_price = np.array([competitors[c]['base_price'] for c in names], dtype=np.float64)
+    service_quality = np.array([competitors[c]['service_quality'] for c in names])
+    cut_pct = np.array([competitors[c].get('price_cut', {}).get('pct', 0.0) for c in names])
+    cut_from = pd.to_datetime([competitors[c].get('price_cut', {}).get('from') for c in names]).to_numpy()
+
+    # Seasonal variation per date as an (n_dates, 1) column
+    month_factor = 1 + 0.1 * np.sin(dates.month.to_numpy() * np.pi / 6)[:, None]
+
+    # Strategic price cuts from each competitor's cut date on
+    cut_active = dates.to_numpy()[:, None] >= cut_from[None, :]
+    price = base_price[None, :] * (1 - cut_pct[None, :] * cut_active) * month_factor
+    price *= 1 + 0.02 * rng.standard_normal((n_dates, n_competitors))
+    market_share = rng.normal(20, 2, (n_dates, n_competitors))
+    service_score = service_quality[None, :] + rng.normal(0, 0.1, (n_dates, n_competitors))
+
+    df = pd.DataFrame({
+        'date': np.repeat(dates, n_competitors),
+        'competitor': pd.Categorical(np.tile(names, n_dates), categories=names),
+        'price_per_ton': price.ravel(),
+        'market_share': market_share.ravel(),
+        'service_quality': service_score.ravel(),
+        'price_strategy': np.tile([competitors[c]['price_strategy'] for c in names], n_dates),
+    })
+
+    # Add customer movement annotations on the rows of the (date, competitor)
+    # grid they fall on; movements between grid dates are not shown
+    events = np.full(len(df), '', dtype=object)
+    for customer, movement in customer_movements.items():
+        date_pos = dates.get_indexer([pd.Timestamp(movement['date'])])[0]
+        if date_pos >= 0 and movement['new_supplier'] in names:
+            events[date_pos * n_competitors + names.index(movement['new_supplier'])] = \
+                f"Gained {customer}: {movement['reason']}"
+    df['events'] = events
+
+    return df, customer_movements, competitors
+
+# Competitor frame per content hash of the main dataset. Bounded LRU caches:
+# the least recently used datasets are evicted first.
+@st.cache_resource(show_spinner=False, max_entries=8)
+def load_competitor_data(fingerprint, _main_df, freq='ME'):
+    return generate_competitor_data(_main_df, freq=freq)
+
+# Price, share and service statistics per competitor in one groupby
+def summarize_competitors(df):
+    return df.groupby('competitor', observed=True).agg(
+        mean_price=('price_per_ton', 'mean'),
+        price_std=('price_per_ton', 'std'),
+        market_share=('market_share', 'mean'),
+        service_quality=('service_quality', 'mean'),
+    ).reset_index()
+
+# Full-history summary; does not depend on the page's date filters
+@st.cache_resource(show_spinner=False, max_entries=8)
+def load_competitor_summary(fingerprint, _df_competitor, freq='ME'):
+    return summarize_competitors(_df_competitor)
+
+# Arrow annotations for customer movements, placed at the new supplier's mean
+# price over the full history
+@st.cache_resource(show_spinner=False, max_entries=8)
+def load_movement_annotations(fingerprint, _summary, _customer_movements, freq='ME'):
+    mean_price = _summary.set_index('competitor')['mean_price']
+    return [{
+        'x': movement['date'],
+        'y': mean_price.get(movement['new_supplier']),
+        'text': f"{customer} → {movement['new_supplier']}",
+    } for customer, movement in _customer_movements.items()]
+
+# Price lines downsampled for display, per zoom window and point budget
+@st.cache_resource(show_spinner=False, max_entries=32)
+def load_price_lines(fingerprint, _df_competitor, max_points, method, window=None, freq='ME'):
+    x_min, x_max = window or (None, None)
+    return downsample_frame(_df_competitor, 'date', 'price_per_ton', 'competitor', max_points,
+                            method=method, x_min=x_min, x_max=x_max)
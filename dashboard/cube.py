@@ -0,0 +1,81 @@
+import streamlit as st
+import pandas as pd
+
+from dashboard import store
+from dashboard.filters import FilterIndex
+
+# Monthly rollup of the order history. One row per combination of these keys
+# that actually occurs, so its size depends on the number of customers and
+# months rather than on the number of orders.
+CUBE_KEYS = ['year', 'month', 'region', 'customer_category', 'product_type',
+             'status', 'customer_name']
+CUBE_MEASURES = ['revenue', 'quantity_tons', 'orders']
+
+# Measures are summed into float64/int64 whatever the storage types of the orders
+def build_cube(df):
+    return df.groupby(CUBE_KEYS, observed=True, sort=False).agg(
+        revenue=('revenue', 'sum'),
+        quantity_tons=('quantity_tons', 'sum'),
+        orders=('revenue', 'size'),
+    ).astype({'revenue': 'float64', 'quantity_tons': 'float64', 'orders': 'int64'}).reset_index()
+
+# Sum the cube measures over the given keys (a slice of the cube, not orders)
+def rollup(cube, keys, measures=CUBE_MEASURES):
+    return cube.groupby(keys, observed=True)[measures].sum().reset_index()
+
+# Fold the rollup of new orders into an existing cube. Costs the size of the
+# cube plus the batch, whatever the length of the order history.
+def merge_cubes(cube, other):
+    merged = pd.concat([cube, other], ignore_index=True)
+    return merged.groupby(CUBE_KEYS, observed=True, sort=False)[CUBE_MEASURES].sum().reset_index()
+
+# Revenue, tonnage, orders and distinct customers per month. Distinct counts
+# are exact because customer_name is one of the cube keys.
+def monthly_totals(cube):
+    grouped = cube.groupby(['year', 'month'], observed=True)
+    totals = grouped[CUBE_MEASURES].sum()
+    totals['customers'] = grouped['customer_name'].nunique()
+    return totals.reset_index()
+
+# Recompute only the given (year, month) rows of a monthly_totals table
+def update_monthly_totals(monthly, cube, months):
+    months = pd.MultiIndex.from_frame(pd.DataFrame(list(months), columns=['year', 'month']))
+    in_months = pd.MultiIndex.from_frame(cube[['year', 'month']]).isin(months)
+    kept = ~pd.MultiIndex.from_frame(monthly[['year', 'month']]).isin(months)
+    updated = pd.concat([monthly[kept], monthly_totals(cube[in_months])], ignore_index=True)
+    return updated.sort_values(['year', 'month'], ignore_index=True)
+
+# The cube of a version as persisted in the store. Callers that may not have
+# the orders loaded (ingestion, alerts, the plugin host) use this so the order
+# history is only loaded, through _load_df(), when the cube was never stored.
+# Cached per version like load_cube, so reruns do not re-read the file.
+@st.cache_resource(show_spinner=False, max_entries=4)
+def read_cube(version, _load_df):
+    key, revision = version
+    cube = store.read_aggregate(key, 'cube', revision)
+    return cube if cube is not None else load_cube(version, _load_df())
+
+# Computed once per dataset version and shared by all sessions. The cube is
+# persisted next to the dataset so ingestion can update it incrementally.
+@st.cache_resource(show_spinner=False, max_entries=4)
+def load_cube(version, _df):
+    key, revision = version
+    cube = store.read_aggregate(key, 'cube', revision)
+    if cube is None:
+        cube = build_cube(_df)
+        store.write_aggregate(key, 'cube', revision, cube)
+    return cube
+
+@st.cache_resource(show_spinner=False, max_entries=4)
+def load_monthly_totals(version, _cube):
+    key, revision = version
+    monthly = store.read_aggregate(key, 'monthly', revision)
+    if monthly is None:
+        monthly = monthly_totals(_cube)
+        store.write_aggregate(key, 'monthly', revision, monthly)
+    return monthly
+
+# Filter index over the cube rows; sidebar selections slice the cube with it
+@st.cache_resource(show_spinner=False, max_entries=4)
+def load_cube_index(version, _cube):
+    return FilterIndex(_cube)
@@ -0,0 +1,166 @@
+import os
+import re
+import hashlib
+import streamlit as st
+import pandas as pd
+import numpy as np
+from datetime import date, datetime, time, timedelta
+
+from dashboard import store
+from dashboard.periods import add_period_keys
+from dashboard.schema import apply_schema
+
+# Bump whenever generate_dummy_data changes shape or semantics so every
+# process drops its cached copy instead of serving a stale frame
+DATA_VERSION = 3
+DEFAULT_SEED = 42
+# Row count of the served dataset; set DASHBOARD_RECORDS to load-test at scale
+DEFAULT_RECORDS = int(os.environ.get('DASHBOARD_RECORDS', 5000))
+# Datasets larger than this are generated in chunks (see dashboard.generate)
+CHUNKED_THRESHOLD = 1_000_000
+
+# Create customer data
+def generate_customer_base():
+    local_customers = [
+        "Metro Wholesale Ltd", "City Bulk Foods", "Region Foods Co", 
+        "Prime Distributors", "Local Grain Exchange", "Urban Bulk Supplies",
+        "District Foods Inc", "Central Wholesale Co", "Town Grain Traders",
+        "Municipal Food Supply", "Community Bulk Store", "Local Mart Chain",
+        "City Food Network", "Regional Bulk Foods", "Metro Food Alliance"
+    ]
+    
+    international_customers = [
+        "Global Grain Corp", "International Food Trade", "World Maize Exchange",
+        "Continental Supplies", "Ocean Foods International", "Cross Border Trading",
+        "Global Bulk Foods", "International Wholesale Co", "World Food Network",
+        "Maritime Traders Inc", "Export Trading Group", "Global Food Alliance",
+        "International Grain Co", "Overseas Food Supply", "World Trade Foods"
+    ]
+    
+    online_customers = [
+        "E-Grain Trading", "Digital Food Exchange", "Online Bulk Foods",
+        "Virtual Trading Co", "E-Commerce Foods", "Digital Wholesale Network",
+        "Cloud Trading Group", "Online Mart Supply", "Digital Food Alliance",
+        "E-Bulk Solutions", "Virtual Food Trade", "Online Exchange Co",
+        "Digital Grain Store", "E-Commerce Trades", "Web Food Network"
+    ]
+    
+    customers_data = []
+    for customer in local_customers:
+        customers_data.append({"name": customer, "category": "Local"})
+    for customer in international_customers:
+        customers_data.append({"name": customer, "category": "International"})
+    for customer in online_customers:
+        customers_data.append({"name": customer, "category": "Online"})
+    
+    return pd.DataFrame(customers_data)
+
+# Generate dummy data
+def generate_dummy_data(n_records=DEFAULT_RECORDS, seed=DEFAULT_SEED, end_date=None):
+    np.random.seed(seed)
+    
+    # Generate customer base
+    customers_df = generate_customer_base()
+    
+    # Date range for last 3 years
+    end_date = end_date or datetime.now()
+    start_date = end_date - timedelta(days=1095)
+    dates = pd.date_range(start=start_date, end=end_date, periods=n_records)
+    
+    # Create dummy data
+    data = {
+        'date': dates,
+        'product_type': np.random.choice(['White Maize', 'Yellow Maize', 'Organic Maize'], n_records),
+        'region': np.random.choice(['North', 'South', 'East', 'West'], n_records),
+        'quantity_tons': np.random.normal(100, 20, n_records),
+        'price_per_ton': np.random.normal(300, 50, n_records),
+    }
+    
+    # Randomly assign customers and their categories
+    customer_indices = np.random.choice(len(customers_df), n_records)
+    data['customer_name'] = customers_df.iloc[customer_indices]['name'].values
+    data['customer_category'] = customers_df.iloc[customer_indices]['category'].values
+    
+    df = pd.DataFrame(data)
+    
+    # Calculate revenue
+    df['revenue'] = df['quantity_tons'] * df['price_per_ton']
+    
+    # Add yearly growth trend (5% year over year)
+    df['years_from_start'] = (df['date'] - df['date'].min()).dt.days / 365
+    df['growth_factor'] = 1 + (df['years_from_start'] * 0.05)
+    df['revenue'] = df['revenue'] * df['growth_factor']
+    
+    # Add seasonal patterns
+    df['month'] = df['date'].dt.month
+    df['year'] = df['date'].dt.year
+    seasonal_factor = np.sin(df['month'] * np.pi / 6) * 0.2 + 1
+    df['revenue'] = df['revenue'] * seasonal_factor
+    
+    # Add active/inactive status (90% active, 10% inactive)
+    df['status'] = np.random.choice(['Active', 'Inactive'], n_records, p=[0.9, 0.1])
+    
+    # Simulate a major customer loss scenario
+    target_customer = "Global Grain Corp"
+    mask = (df['customer_name'] == target_customer) & (df['date'] > (end_date - timedelta(days=180)))
+    df.loc[mask, 'revenue'] = df.loc[mask, 'revenue'] * 0.3
+    df.loc[mask, 'status'] = 'Inactive'
+    
+    return df.drop(['years_from_start', 'growth_factor'], axis=1)
+
+# Identifies one build of the sales frame. Everything derived from the frame
+# (indexes, rollups, exports) should be cached under this key. The served
+# dataset's key does not change from day to day: it is generated once, up to
+# the day it is first built, and then grows through ingested batches. An
+# explicit as_of names a separate, dated build.
+def dataset_key(seed=DEFAULT_SEED, n_records=DEFAULT_RECORDS, as_of=None):
+    key = f"v{DATA_VERSION}-s{seed}-n{n_records}"
+    return f"{key}-{as_of:%Y%m%d}" if as_of else key
+
+# Whether a stored dataset is a build (any version, dated or not) of the same
+# seed and row count
+def _same_build(name, seed, n_records):
+    return re.fullmatch(rf"v\d+-s{seed}-n{n_records}(-\d{{8}})?", name) is not None
+
+# Generate and publish a dataset key to the shared store unless some process
+# already did. Cached so each process checks at most once per key.
+@st.cache_resource(show_spinner="Generating sales data...", max_entries=4)
+def _publish_sales_data(data_version, seed, n_records, as_of):
+    key = dataset_key(seed, n_records, as_of)
+    if not store.has_dataset(key):
+        end_date = datetime.combine(as_of or date.today(), time())
+        if n_records > CHUNKED_THRESHOLD:
+            from dashboard.generate import write_sales_dataset
+            write_sales_dataset(key, n_records, seed=seed, end_date=end_date)
+        else:
+            df = apply_schema(add_period_keys(generate_dummy_data(n_records, seed=seed, end_date=end_date)))
+            store.publish_dataset(df, key)
+        store.prune_datasets(key, lambda name: _same_build(name, seed, n_records))
+    return key
+
+# Version of the served dataset as (key, revision). The key changes with
+# DATA_VERSION, seed and row count; the revision with every ingested batch.
+# Caches of anything derived from the data should be keyed on it.
+def dataset_version(seed=DEFAULT_SEED, n_records=DEFAULT_RECORDS, as_of=None):
+    key = _publish_sales_data(DATA_VERSION, seed, n_records, as_of)
+    return key, store.dataset_revision(key)
+
+# Built once per process and version, and shared by every session. The
+# schema is applied on load as well as on write, so every session holds the
+# compact types whatever wrote the store.
+@st.cache_resource(show_spinner="Loading sales data...", max_entries=2)
+def _read_sales_data(key, revision):
+    return apply_schema(store.read_dataset(key))
+
+# Content hash of a loaded frame, computed once per dataset version. Caches
+# of data derived from the frame's contents key on this rather than on the
+# version so identical data is never recomputed.
+@st.cache_resource(show_spinner=False, max_entries=4)
+def dataset_fingerprint(version, _df):
+    return hashlib.sha1(pd.util.hash_pandas_object(_df, index=False).to_numpy().tobytes()).hexdigest()
+
+# Process-wide dataset provider. The returned frame is shared across sessions
+# and must be treated as read-only; filter it, never modify it in place.
+def load_sales_data(seed=DEFAULT_SEED, n_records=DEFAULT_RECORDS, as_of=None, version=None):
+    key, revision = version or dataset_version(seed, n_records, as_of)
+    return _read_sales_data(key, revision)
@@ -0,0 +1,64 @@
+import numpy as np
+import pandas as pd
+
+# Server-side downsampling for line charts. Both methods return the sorted
+# positions of the points to keep, so they can be applied to any frame.
+DOWNSAMPLE_METHODS = ['lttb', 'minmax']
+
+def _as_float(values):
+    values = np.asarray(values)
+    if np.issubdtype(values.dtype, np.datetime64):
+        values = values.astype('datetime64[ns]').astype(np.int64)
+    return values.astype(np.float64)
+
+# Largest-Triangle-Three-Buckets: keeps the first and last point and, from
+# each of n_out - 2 equal buckets, the point forming the largest triangle
+# with the previously kept point and the mean of the next bucket. Preserves
+# the visual shape of a series far better than taking every k-th point.
+def lttb(x, y, n_out):
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    x, y = _as_float(x), _as_float(y)
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    kept = np.empty(n_out, dtype=np.int64)
+    kept[0], kept[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        start, end = edges[i], edges[i + 1]
+        next_start, next_end = (edges[i + 1], edges[i + 2]) if i + 2 < len(edges) else (n - 1, n)
+        avg_x = x[next_start:next_end].mean()
+        avg_y = y[next_start:next_end].mean()
+        area = np.abs((x[a] - avg_x) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (avg_y - y[a]))
+        a = start + int(np.argmax(area))
+        kept[i + 1] = a
+    return kept
+
+# Min/max per bucket: keeps the lowest and highest point of each of n_out // 2
+# equal buckets, so spikes are never dropped. Fully vectorised.
+def minmax(x, y, n_out):
+    n = len(y)
+    n_buckets = n_out // 2
+    if n_out >= n or n_buckets < 1:
+        return np.arange(n)
+    y = _as_float(y)
+    bucket = np.arange(n) * n_buckets // n
+    order = np.lexsort((y, bucket))
+    bucket_start = np.flatnonzero(np.r_[True, np.diff(bucket[order]) != 0])
+    bucket_end = np.r_[bucket_start[1:], n] - 1
+    return np.unique(np.concatenate([order[bucket_start], order[bucket_end]]))
+
+# Downsample each series of a long-format frame (one row per point, series in
+# column `by`) to at most max_points points, optionally restricted to the
+# x window [x_min, x_max] so that zooming in refines the detail
+def downsample_frame(df, x, y, by, max_points, method='lttb', x_min=None, x_max=None):
+    select = lttb if method == 'lttb' else minmax
+    parts = []
+    for _, series in df.groupby(by, observed=True, sort=False):
+        series = series.sort_values(x, kind='stable')
+        xs = series[x].to_numpy()
+        lo = 0 if x_min is None else np.searchsorted(xs, np.asarray(x_min, dtype=xs.dtype), side='left')
+        hi = len(xs) if x_max is None else np.searchsorted(xs, np.asarray(x_max, dtype=xs.dtype), side='right')
+        window = series.iloc[lo:hi]
+        parts.append(window.iloc[select(window[x].to_numpy(), window[y].to_numpy(), max_points)])
+    return pd.concat(parts) if parts else df.iloc[0:0]
@@ -0,0 +1,203 @@
+import os
+import time
+import uuid
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+
+import streamlit as st
+
+# Excel and PDF writers are optional; CSV always works
+try:
+    import xlsxwriter
+except ImportError:
+    xlsxwriter = None
+try:
+    import openpyxl
+except ImportError:
+    openpyxl = None
+try:
+    from reportlab.lib.pagesizes import A4, landscape
+    from reportlab.pdfgen import canvas as pdf_canvas
+except ImportError:
+    pdf_canvas = None
+
+# Exports of the filtered order rows, written in the background chunk by
+# chunk so neither the rows nor the workbook are ever held in memory whole.
+# Files land in data/exports and are offered for download once complete.
+EXPORT_DIR = os.path.join('data', 'exports')
+EXPORT_COLUMNS = {
+    'date': 'Date',
+    'customer_name': 'Customer Name',
+    'customer_category': 'Category',
+    'region': 'Region',
+    'product_type': 'Product',
+    'status': 'Status',
+    'quantity_tons': 'Volume (Tons)',
+    'price_per_ton': 'Price per Ton',
+    'revenue': 'Revenue',
+}
+CHUNK_ROWS = 50_000
+# An Excel sheet holds 1,048,576 rows; longer exports continue on a new sheet
+EXCEL_SHEET_ROWS = 1_048_575
+# A PDF is a report, not a data dump: it lists at most this many orders
+PDF_MAX_ROWS = 2_000
+MAX_AGE_SECONDS = 24 * 3600
+
+# Formats that can be written here, and the marketplace plugin enabling each
+EXPORT_FORMATS = {
+    'CSV': ('csv', 'text/csv', None),
+    'Excel': ('xlsx', 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet', 'export_excel'),
+    'PDF': ('pdf', 'application/pdf', 'pdf_reports'),
+}
+
+# Library each optional format is written with (listed in requirements.txt)
+FORMAT_LIBRARIES = {'Excel': 'xlsxwriter', 'PDF': 'reportlab'}
+
+def _installed():
+    return {'CSV': True, 'Excel': xlsxwriter is not None or openpyxl is not None,
+            'PDF': pdf_canvas is not None}
+
+def available_formats(active_plugins):
+    installed = _installed()
+    return [name for name, (_, _, plugin) in EXPORT_FORMATS.items()
+            if installed[name] and (plugin is None or plugin in active_plugins)]
+
+# Formats whose plugin is active but whose library is not installed, mapped
+# to the library to install
+def missing_libraries(active_plugins):
+    installed = _installed()
+    return {name: FORMAT_LIBRARIES[name] for name, (_, _, plugin) in EXPORT_FORMATS.items()
+            if not installed[name] and plugin in active_plugins}
+
+# Selected order rows in export order, a chunk of Python values at a time
+def _chunks(df, rows, chunk_rows=CHUNK_ROWS):
+    for start in range(0, len(rows), chunk_rows):
+        chunk = df.iloc[rows[start:start + chunk_rows]]
+        yield start + len(chunk), zip(*(chunk[col].tolist() for col in EXPORT_COLUMNS))
+
+def _report(job, written, total):
+    job.report(written / max(total, 1), f"Wrote {written:,} of {total:,} rows")
+
+def _write_csv(path, job, df, rows, title, summary):
+    with open(path, 'w', newline='') as f:
+        f.write(','.join(EXPORT_COLUMNS.values()) + '\n')
+        for start in range(0, len(rows), CHUNK_ROWS):
+            chunk = df.iloc[rows[start:start + CHUNK_ROWS]][list(EXPORT_COLUMNS)]
+            chunk.to_csv(f, header=False, index=False)
+            _report(job, start + len(chunk), len(rows))
+
+def _write_xlsx(path, job, df, rows, title, summary):
+    if xlsxwriter is not None:
+        # constant_memory flushes each row to disk as soon as the next starts
+        workbook = xlsxwriter.Workbook(path, {'constant_memory': True})
+        date_format = workbook.add_format({'num_format': 'yyyy-mm-dd'})
+        def new_sheet(number):
+            sheet = workbook.add_worksheet(f'Orders {number}' if number > 1 else 'Orders')
+            sheet.set_column(0, 0, 12, date_format)
+            sheet.write_row(0, 0, list(EXPORT_COLUMNS.values()))
+            return sheet
+        def write(sheet, r, values):
+            sheet.write_datetime(r, 0, values[0], date_format)
+            sheet.write_row(r, 1, values[1:])
+        close = workbook.close
+    else:
+        workbook = openpyxl.Workbook(write_only=True)
+        def new_sheet(number):
+            sheet = workbook.create_sheet(f'Orders {number}' if number > 1 else 'Orders')
+            sheet.append(list(EXPORT_COLUMNS.values()))
+            return sheet
+        def write(sheet, r, values):
+            sheet.append(values)
+        close = lambda: workbook.save(path)
+    sheets = 1
+    sheet = new_sheet(sheets)
+    r = 0
+    for written, values in _chunks(df, rows):
+        for row in values:
+            if r == EXCEL_SHEET_ROWS:
+                sheets += 1
+                sheet = new_sheet(sheets)
+                r = 0
+            r += 1
+            write(sheet, r, row)
+        _report(job, written, len(rows))
+    close()
+
+def _write_pdf(path, job, df, rows, title, summary):
+    page_width, page_height = landscape(A4)
+    pdf = pdf_canvas.Canvas(path, pagesize=(page_width, page_height))
+    widths = [70, 120, 80, 70, 90, 70, 70, 70, 90]
+    margin, line = 36, 12
+
+    def header_row(y):
+        pdf.setFont('Helvetica-Bold', 8)
+        x = margin
+        for label, width in zip(EXPORT_COLUMNS.values(), widths):
+            pdf.drawString(x, y, label)
+            x += width
+        pdf.setFont('Helvetica', 8)
+        return y - line
+
+    pdf.setFont('Helvetica-Bold', 16)
+    pdf.drawString(margin, page_height - margin, title)
+    pdf.setFont('Helvetica', 10)
+    y = page_height - margin - 20
+    pdf.drawString(margin, y, f"Generated {datetime.now():%Y-%m-%d %H:%M}")
+    for label, value in summary.items():
+        y -= 14
+        pdf.drawString(margin, y, f"{label}: {value}")
+    shown = min(len(rows), PDF_MAX_ROWS)
+    y -= 24
+    pdf.drawString(margin, y, f"Orders ({shown:,} of {len(rows):,} shown; export CSV or Excel for all rows)")
+    y = header_row(y - 16)
+    for written, values in _chunks(df, rows[:shown], chunk_rows=500):
+        for row in values:
+            if y < margin:
+                pdf.showPage()
+                y = header_row(page_height - margin)
+            x = margin
+            for value, width in zip(row, widths):
+                text = value.strftime('%Y-%m-%d') if hasattr(value, 'strftime') else (
+                    f"{value:,.2f}" if isinstance(value, float) else str(value))
+                pdf.drawString(x, y, text)
+                x += width
+            y -= line
+        _report(job, written, shown)
+    pdf.save()
+
+_WRITERS = {'CSV': _write_csv, 'Excel': _write_xlsx, 'PDF': _write_pdf}
+
+def _prune_exports(max_age=MAX_AGE_SECONDS):
+    if not os.path.isdir(EXPORT_DIR):
+        return
+    cutoff = time.time() - max_age
+    for name in os.listdir(EXPORT_DIR):
+        path = os.path.join(EXPORT_DIR, name)
+        if os.path.getmtime(path) < cutoff:
+            os.remove(path)
+
+# Job body for a runner (see dashboard.runner): write df rows (positions) in
+# the given format and return the finished file's path. The file only gets
+# its final name once complete.
+def export_view(job, fmt, df, rows, title, summary):
+    os.makedirs(EXPORT_DIR, exist_ok=True)
+    _prune_exports()
+    extension = EXPORT_FORMATS[fmt][0]
+    path = os.path.join(EXPORT_DIR, f"orders-{datetime.now():%Y%m%d-%H%M%S}-{uuid.uuid4().hex[:6]}.{extension}")
+    tmp_path = path + '.part'
+    try:
+        _WRITERS[fmt](tmp_path, job, df, rows, title, summary)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return path
+
+def export_mime(fmt):
+    return EXPORT_FORMATS[fmt][1]
+
+# Exports get their own small pool so they never hold up query threads
+@st.cache_resource(show_spinner=False)
+def load_export_pool(max_workers=2):
+    return ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='export')
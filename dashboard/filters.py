@@ -0,0 +1,61 @@
+import streamlit as st
+import pandas as pd
+import numpy as np
+
+# Sidebar dimensions indexed for filtering
+FILTER_DIMENSIONS = ['year', 'month', 'customer_name', 'customer_category',
+                     'region', 'product_type', 'status']
+
+# Categorical filter index. Every dimension is factorized into integer codes
+# once, and each distinct value keeps a packed row bitmap (one bit per row),
+# so a selection resolves to bitwise OR/AND over bitmaps instead of string
+# comparisons over whole columns.
+class FilterIndex:
+    def __init__(self, df, dimensions=FILTER_DIMENSIONS):
+        self.n_rows = len(df)
+        self.codes = {}
+        self.values = {}
+        self.positions = {}
+        self.bitmaps = {}
+        for dim in dimensions:
+            codes, uniques = pd.factorize(df[dim], sort=True)
+            self.codes[dim] = codes.astype(np.min_scalar_type(max(len(uniques) - 1, 0)))
+            self.values[dim] = list(uniques)
+            self.positions[dim] = {value: i for i, value in enumerate(uniques)}
+            bitmaps = np.empty((len(uniques), (self.n_rows + 7) // 8), dtype=np.uint8)
+            for i in range(len(uniques)):
+                bitmaps[i] = np.packbits(self.codes[dim] == i)
+            self.bitmaps[dim] = bitmaps
+
+    # Bitmap of rows matching any of the given values of one dimension
+    def _dimension_bitmap(self, dim, wanted):
+        lookup = self.positions[dim]
+        rows = [lookup[value] for value in wanted if value in lookup]
+        if not rows:
+            return np.zeros(self.bitmaps[dim].shape[1], dtype=np.uint8)
+        return np.bitwise_or.reduce(self.bitmaps[dim][rows], axis=0)
+
+    # Resolve a selection ({dimension: allowed values}) to sorted row positions.
+    # Dimensions missing from the selection are unconstrained; an empty list
+    # matches nothing, like Series.isin([]).
+    def select(self, selection):
+        bits = None
+        for dim, wanted in selection.items():
+            dim_bits = self._dimension_bitmap(dim, wanted)
+            bits = dim_bits if bits is None else np.bitwise_and(bits, dim_bits, out=bits)
+        if bits is None:
+            return np.arange(self.n_rows)
+        return np.flatnonzero(np.unpackbits(bits, count=self.n_rows))
+
+    # Rows of df (the frame the index was built from) matching the selection
+    def filter(self, df, selection):
+        return df.take(self.select(selection))
+
+# Hashable, order-independent form of a selection for use as a cache key
+def selection_key(selection):
+    return tuple(sorted((dim, tuple(sorted(values))) for dim, values in selection.items()))
+
+# Build the index once per dataset version; shared by all sessions
+@st.cache_resource(show_spinner=False, max_entries=4)
+def load_filter_index(version, _df):
+    return FilterIndex(_df)
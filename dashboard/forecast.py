@@ -0,0 +1,129 @@
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from dashboard.filters import FilterIndex
+from dashboard.incremental import grow_months, load_incremental
+from dashboard.periods import month_keys
+
+# Monthly revenue forecasts for every series of the cube at once. A series is
+# one customer x product combination, split further by the other cube
+# dimensions (region, category, status) so that every sidebar filter selects
+# whole series. All series share one design matrix
+#     [1, t, sin(2 pi m / 12), cos(2 pi m / 12)]
+# (trend plus yearly seasonality), so fitting them is a single least-squares
+# solve against a (months x series) revenue matrix. The normal-equation
+# accumulators X'X and X'Y are kept, so new orders and newly completed months
+# are folded in without revisiting the history. Forecasts are linear in the
+# revenue, so the forecast of any selection is the sum of its series'.
+SERIES_KEYS = ['customer_name', 'product_type', 'region', 'customer_category', 'status']
+N_TERMS = 4
+DEFAULT_HORIZON = 6
+
+class ForecastModel:
+    def __init__(self, cube):
+        self.t0 = None
+        self.first_key = None
+        self.n_months = 0
+        self.fitted_months = 0
+        self.series = pd.MultiIndex.from_arrays([[]] * len(SERIES_KEYS), names=SERIES_KEYS)
+        self.revenue = np.zeros((0, 0))
+        self.xtx = np.zeros((N_TERMS, N_TERMS))
+        self.xty = np.zeros((N_TERMS, 0))
+        self.coef = np.zeros((N_TERMS, 0))
+        self._index = None
+        self.update(cube)
+
+    def copy(self):
+        other = object.__new__(ForecastModel)
+        other.__dict__.update(self.__dict__)
+        other.revenue, other.xtx, other.xty = self.revenue.copy(), self.xtx.copy(), self.xty.copy()
+        return other
+
+    def design(self, keys):
+        keys = np.asarray(keys, dtype=np.float64)
+        angle = 2 * np.pi * keys / 12
+        return np.column_stack([np.ones_like(keys), keys - self.t0, np.sin(angle), np.cos(angle)])
+
+    # Last month key with orders
+    @property
+    def last_key(self):
+        return None if self.first_key is None else self.first_key + self.n_months - 1
+
+    # Add a cube of new orders. Revenue for months already in the fit goes
+    # straight into X'Y; months that became complete (the month with the
+    # latest orders is treated as partial) add their rows to X'X and X'Y.
+    def update(self, cube):
+        if len(cube):
+            keys = month_keys(cube['year'], cube['month'])
+            if self.t0 is None:
+                self.t0 = int(keys.min())
+            self._grow_months(int(keys.min()), int(keys.max()))
+            cols = self._series_columns(cube)
+            batch = np.bincount((keys - self.first_key) * len(self.series) + cols,
+                                weights=cube['revenue'].to_numpy(dtype=np.float64),
+                                minlength=self.n_months * len(self.series)).reshape(self.n_months, -1)
+            self.revenue += batch
+            fitted = self._fitted_keys()
+            self.xty += self.design(fitted).T @ batch[fitted - self.first_key]
+            complete = np.arange(self.first_key, self.last_key)
+            new = complete[~np.isin(complete, fitted)]
+            if len(new):
+                x = self.design(new)
+                self.xtx += x.T @ x
+                self.xty += x.T @ self.revenue[new - self.first_key]
+                self._fitted = np.union1d(fitted, new)
+            self.coef = np.linalg.lstsq(self.xtx, self.xty, rcond=None)[0]
+            self._index = None
+        return self
+
+    def _fitted_keys(self):
+        return getattr(self, '_fitted', np.zeros(0, dtype=np.int64))
+
+    def _grow_months(self, low, high):
+        self.first_key, self.n_months, pad = grow_months(self.first_key, self.n_months, low, high)
+        if any(pad):
+            self.revenue = np.pad(self.revenue, (pad, (0, 0)))
+
+    # Column of each cube row's series, appending series not seen before
+    def _series_columns(self, cube):
+        rows = pd.MultiIndex.from_frame(cube[SERIES_KEYS].astype(str))
+        cols = self.series.get_indexer(rows)
+        if (cols < 0).any():
+            new = rows[cols < 0].unique()
+            self.series = self.series.append(new)
+            self.revenue = np.pad(self.revenue, ((0, 0), (0, len(new))))
+            self.xty = np.pad(self.xty, ((0, 0), (0, len(new))))
+            cols = self.series.get_indexer(rows)
+        return cols
+
+    # Series matching a sidebar selection (year and month are ignored)
+    def select(self, selection):
+        if self._index is None:
+            self._index = FilterIndex(self.series.to_frame(index=False), SERIES_KEYS)
+        return self._index.select({k: v for k, v in selection.items() if k in SERIES_KEYS})
+
+    # Forecast revenue for the horizon months after the last complete month,
+    # summed over the given series (all by default). Returns month keys and
+    # revenue; the sum is clipped at zero, individual series are not.
+    def forecast(self, series=None, horizon=DEFAULT_HORIZON):
+        if self.first_key is None:
+            return np.zeros(0, dtype=np.int64), np.zeros(0)
+        keys = np.arange(self.last_key, self.last_key + horizon)
+        coef = self.coef.sum(axis=1) if series is None else self.coef[:, series].sum(axis=1)
+        return keys, np.clip(self.design(keys) @ coef, 0, None)
+
+    # Next-month forecast of every series, as a frame
+    def series_forecasts(self, horizon=1):
+        keys = np.arange(self.last_key, self.last_key + horizon)
+        values = self.design(keys) @ self.coef
+        table = self.series.to_frame(index=False)
+        table['forecast'] = values.sum(axis=0)
+        table['trend'] = self.coef[1]
+        return table
+
+# Model of a data version, fitted from the previous version's model plus the
+# parts appended since rather than refitted from scratch
+@st.cache_resource(show_spinner=False, max_entries=2)
+def load_forecast_model(version, _cube):
+    return load_incremental(version, _cube, ForecastModel, lambda model, cube: model.copy().update(cube))
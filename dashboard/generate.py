@@ -0,0 +1,112 @@
+import argparse
+import numpy as np
+import pandas as pd
+from datetime import date, datetime, time, timedelta
+
+from dashboard import store
+from dashboard.data import DEFAULT_SEED, dataset_key, generate_customer_base
+from dashboard.periods import add_period_keys
+from dashboard.schema import apply_schema
+
+# Load-test data generator. Produces the same columns and effects as
+# generate_dummy_data (growth, seasonality, the Global Grain Corp loss) but in
+# fixed-size chunks written straight to the shared store, so memory stays
+# bounded by the chunk size whatever the total row count. Each chunk has its
+# own random stream derived from (seed, chunk number), which makes the output
+# reproducible and lets any chunk be regenerated on its own.
+DEFAULT_CHUNK_SIZE = 1_000_000
+PRODUCTS = ['White Maize', 'Yellow Maize', 'Organic Maize']
+REGIONS = ['North', 'South', 'East', 'West']
+STATUSES = ['Active', 'Inactive']
+LOST_CUSTOMER = "Global Grain Corp"
+
+# Codes index into categories as listed; the result's categories are sorted,
+# like astype('category') gives the in-memory generator, so category order
+# (and with it the order of sidebar options) is alphabetical
+def _categorical(codes, categories):
+    return pd.Categorical.from_codes(codes, categories=categories).reorder_categories(sorted(categories))
+
+# Generate rows [start, stop) of an n_records dataset ending at end_date
+def generate_sales_chunk(chunk_number, start, stop, n_records, seed=DEFAULT_SEED, end_date=None):
+    rng = np.random.default_rng([seed, chunk_number])
+    size = stop - start
+    customers_df = generate_customer_base()
+    customer_names = customers_df['name'].tolist()
+    categories = sorted(customers_df['category'].unique())
+    customer_category_codes = customers_df['category'].map({c: i for i, c in enumerate(categories)}).to_numpy()
+
+    # Evenly spaced timestamps over the last 3 years, like pd.date_range(periods=n)
+    end_date = pd.Timestamp(end_date or datetime.now())
+    start_date = end_date - timedelta(days=1095)
+    step_ns = (end_date - start_date).value / max(n_records - 1, 1)
+    offsets = (np.arange(start, stop, dtype=np.float64) * step_ns).astype(np.int64)
+    dates = pd.DatetimeIndex(start_date.value + offsets)
+
+    customer_codes = rng.integers(0, len(customer_names), size)
+    quantity = rng.normal(100, 20, size)
+    price = rng.normal(300, 50, size)
+    status_codes = (rng.random(size) >= 0.9).astype(np.int8)
+
+    month = dates.month.to_numpy()
+    years_from_start = np.floor(offsets / 86_400e9) / 365
+    revenue = quantity * price * (1 + years_from_start * 0.05) * (np.sin(month * np.pi / 6) * 0.2 + 1)
+
+    # Simulate a major customer loss scenario
+    lost = (customer_codes == customer_names.index(LOST_CUSTOMER)) & \
+           (dates > end_date - timedelta(days=180))
+    revenue[lost] *= 0.3
+    status_codes[lost] = STATUSES.index('Inactive')
+
+    df = pd.DataFrame({
+        'date': dates,
+        'product_type': _categorical(rng.integers(0, len(PRODUCTS), size), PRODUCTS),
+        'region': _categorical(rng.integers(0, len(REGIONS), size), REGIONS),
+        'quantity_tons': quantity,
+        'price_per_ton': price,
+        'customer_name': _categorical(customer_codes, customer_names),
+        'customer_category': _categorical(customer_category_codes[customer_codes], categories),
+        'revenue': revenue,
+        'month': month,
+        'year': dates.year.to_numpy(),
+        'status': _categorical(status_codes, STATUSES),
+    })
+    return apply_schema(add_period_keys(df))
+
+# Yield the dataset chunk by chunk
+def generate_sales_chunks(n_records, chunk_size=DEFAULT_CHUNK_SIZE, seed=DEFAULT_SEED, end_date=None):
+    for chunk_number, start in enumerate(range(0, n_records, chunk_size)):
+        stop = min(start + chunk_size, n_records)
+        yield generate_sales_chunk(chunk_number, start, stop, n_records, seed=seed, end_date=end_date)
+
+# Stream a generated dataset into the store under key, one part per chunk
+def write_sales_dataset(key, n_records, chunk_size=DEFAULT_CHUNK_SIZE, seed=DEFAULT_SEED,
+                        end_date=None, progress=None):
+    n_chunks = -(-n_records // chunk_size)
+    for chunk_number, chunk in enumerate(generate_sales_chunks(n_records, chunk_size, seed, end_date)):
+        store.write_part(key, chunk_number, chunk)
+        if progress:
+            progress(chunk_number + 1, n_chunks)
+    store.commit_dataset(key, n_chunks)
+    return store.dataset_dir(key)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate a large synthetic sales dataset into the shared store.")
+    parser.add_argument('--rows', type=int, required=True, help="total number of order rows")
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument('--seed', type=int, default=DEFAULT_SEED)
+    args = parser.parse_args(argv)
+
+    # Written under the served dataset key so the dashboard picks it up when
+    # started with DASHBOARD_RECORDS set to the same row count. An existing
+    # dataset may hold ingested orders, so it is never overwritten.
+    key = dataset_key(args.seed, args.rows)
+    if store.has_dataset(key):
+        print(f"Dataset {key} already exists in {store.dataset_dir(key)}")
+        return
+    path = write_sales_dataset(key, args.rows, args.chunk_size, args.seed,
+                               end_date=datetime.combine(date.today(), time()),
+                               progress=lambda done, total: print(f"chunk {done}/{total}"))
+    print(f"Wrote {args.rows:,} rows to {path}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,39 @@
+import threading
+
+from dashboard import store
+from dashboard.cube import build_cube
+
+# Models that are kept up to date incrementally as orders are ingested
+# (leaderboards, forecasts). The latest model of each kind and dataset key is
+# remembered, so the model of a new revision is derived from it plus the parts
+# appended since, rather than rebuilt from the whole cube.
+_latest = {}
+_latest_lock = threading.Lock()
+
+# The model of a data version. build(cube) makes a model from a version's
+# cube; update(model, cube) returns a new model with a cube of appended orders
+# folded in, leaving model untouched for readers still holding it. build also
+# identifies the kind of model. Callers cache the result per version.
+def load_incremental(version, cube, build, update):
+    key, revision = version
+    with _latest_lock:
+        previous = _latest.get((build, key))
+    if previous and previous[0] is not None and revision is not None and previous[0] < revision:
+        model = update(previous[1], build_cube(store.read_parts_since(key, previous[0])))
+    else:
+        model = build(cube)
+    with _latest_lock:
+        latest = _latest.get((build, key))
+        if latest is None or latest[0] is None or (revision or 0) >= latest[0]:
+            _latest[build, key] = (revision, model)
+    return model
+
+# Extend the month range first_key..first_key + n_months - 1 to cover
+# low..high. Returns the new first_key and n_months and the (before, after)
+# number of months added, for padding month-indexed matrices.
+def grow_months(first_key, n_months, low, high):
+    if first_key is None:
+        first_key, n_months = low, 0
+    before = max(first_key - low, 0)
+    after = max(high - (first_key + n_months - 1), 0)
+    return first_key - before, n_months + before + after, (before, after)
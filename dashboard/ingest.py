@@ -0,0 +1,63 @@
+import numpy as np
+import pandas as pd
+
+from dashboard import store
+from dashboard.cube import build_cube, load_monthly_totals, merge_cubes, read_cube, update_monthly_totals
+from dashboard.data import load_sales_data
+from dashboard.periods import add_period_keys
+from dashboard.schema import apply_schema
+
+# Append-only ingestion of new orders. A batch is written to the store as a
+# new part, and the persisted monthly cube and monthly totals are updated
+# from the batch alone, so a daily refresh costs in proportion to the day's
+# orders rather than the full history.
+REQUIRED_COLUMNS = ['date', 'customer_name', 'customer_category', 'region',
+                    'product_type', 'quantity_tons', 'price_per_ton']
+MEASURE_COLUMNS = ['quantity_tons', 'price_per_ton', 'revenue']
+
+# Validate a batch and derive the columns the stored dataset carries
+def prepare_orders(batch):
+    missing = [col for col in REQUIRED_COLUMNS if col not in batch.columns]
+    if missing:
+        raise ValueError(f"New orders are missing columns: {', '.join(missing)}")
+    blank = [col for col in REQUIRED_COLUMNS if batch[col].isna().any()]
+    if blank:
+        raise ValueError(f"New orders have blank values in: {', '.join(blank)}")
+    batch = batch.copy()
+    batch['date'] = pd.to_datetime(batch['date'])
+    # Non-numeric measures become NaN and are rejected with the infinite ones
+    measures = [col for col in MEASURE_COLUMNS if col in batch.columns]
+    batch[measures] = batch[measures].apply(pd.to_numeric, errors='coerce')
+    invalid = [col for col in measures if not np.isfinite(batch[col].to_numpy(dtype=np.float64)).all()]
+    if invalid:
+        raise ValueError(f"New orders have non-numeric or infinite values in: {', '.join(invalid)}")
+    if 'revenue' not in batch.columns:
+        batch['revenue'] = batch['quantity_tons'] * batch['price_per_ton']
+    if 'status' not in batch.columns:
+        batch['status'] = 'Active'
+    batch['month'] = batch['date'].dt.month
+    batch['year'] = batch['date'].dt.year
+    return apply_schema(add_period_keys(batch.sort_values('date', kind='stable', ignore_index=True)))
+
+# Append a batch of orders to the dataset stored under key and return the new
+# revision
+def ingest_orders(batch, key):
+    batch = prepare_orders(batch)
+    if batch.empty:
+        return store.dataset_revision(key)
+
+    # Aggregates of the current revision, read from the store; the full
+    # history is only loaded to rebuild them if they were never persisted
+    version = (key, store.dataset_revision(key))
+    cube = read_cube(version, lambda: load_sales_data(version=version))
+    monthly = store.read_aggregate(key, 'monthly', version[1])
+    if monthly is None:
+        monthly = load_monthly_totals(version, cube)
+
+    def store_aggregates(revision):
+        merged = merge_cubes(cube, build_cube(batch))
+        touched = batch[['year', 'month']].drop_duplicates().itertuples(index=False)
+        store.write_aggregate(key, 'cube', revision, merged)
+        store.write_aggregate(key, 'monthly', revision, update_monthly_totals(monthly, merged, touched))
+
+    return store.append_part(key, batch, before_commit=store_aggregates)
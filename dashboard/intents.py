@@ -0,0 +1,226 @@
+import re
+import time
+import zlib
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+
+import numpy as np
+import streamlit as st
+
+from dashboard.query import Intent, normalize_question, parse_intent, parse_month
+
+# Pluggable intent classification for questions the regex dispatch table does
+# not understand. Questions are masked first ("revenue in 2024" becomes
+# "revenue in <year>"); a backend maps the masked text to an intent template
+# (kind, metric, dimension) and the router fills in year, month and rank from
+# the original question. Because templates do not depend on the slots, one
+# model call serves every question that differs only in dates or counts.
+
+_YEAR = re.compile(r'\b(20\d\d)\b')
+_MONTH = re.compile(r'\b(jan|feb|mar|apr|may|jun|jul|aug|sep|oct|nov|dec)[a-z]*\b')
+_NUMBER = re.compile(r'\b(\d+)\b')
+
+# Bottom rankings ("worst customers", "which regions performed worst") look
+# like the supported top rankings to a similarity model, which would answer
+# the opposite of the question; they are declined before any lookup
+_BOTTOM = re.compile(r'\b(worst|bottom|lowest|least|smallest|weakest|fewest|poorest)\b')
+
+def asks_for_bottom(question):
+    return _BOTTOM.search(normalize_question(question)) is not None
+
+def mask_question(question):
+    text = normalize_question(question)
+    text = _YEAR.sub('<year>', text)
+    text = _MONTH.sub('<month>', text)
+    return _NUMBER.sub('<n>', text)
+
+# Year, month and count mentioned in a question
+def extract_slots(question):
+    text = normalize_question(question)
+    year = _YEAR.search(text)
+    month = _MONTH.search(text)
+    number = _NUMBER.search(_YEAR.sub(' ', text))
+    return {
+        'year': int(year.group(1)) if year else None,
+        'month': parse_month(month.group(1)) if month else None,
+        'rank': int(number.group(1)) if number else None,
+    }
+
+# Complete an intent template with the question's slots; None when a slot the
+# intent needs is missing
+def fill_slots(template, slots):
+    if template.kind in ('period_total', 'top') and slots['year'] is None:
+        return None
+    if template.kind == 'period_total':
+        return template._replace(year=slots['year'], month=slots['month'])
+    if template.kind == 'top':
+        return template._replace(year=slots['year'], month=slots['month'], rank=slots['rank'] or 1)
+    return template
+
+# Deterministic text embedding: hashed unigrams and bigrams, L2-normalised.
+# crc32 rather than hash() so vectors agree across processes.
+EMBEDDING_DIM = 512
+
+def embed(text, dim=EMBEDDING_DIM):
+    tokens = re.findall(r'<\w+>|[a-z]+', text)
+    features = tokens + [f'{a} {b}' for a, b in zip(tokens, tokens[1:])]
+    vector = np.zeros(dim, dtype=np.float32)
+    for feature in features:
+        vector[zlib.crc32(feature.encode()) % dim] += 1.0
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+# Backend interface. classify() receives a masked question and returns an
+# intent template or None. Implementations may be slow; the router runs them
+# off the script thread.
+class IntentBackend:
+    name = 'base'
+
+    def classify(self, masked_question):
+        raise NotImplementedError
+
+# Deterministic stand-in for a local model: nearest labelled example by
+# embedding similarity. latency simulates model inference time.
+class MockModelBackend(IntentBackend):
+    name = 'mock'
+    EXAMPLES = [
+        ("what is the total revenue", Intent('total', 'revenue')),
+        ("how much did we sell overall in dollars", Intent('total', 'revenue')),
+        ("total sales all time", Intent('total', 'revenue')),
+        ("how many tons did we ship in total", Intent('total', 'quantity_tons')),
+        ("overall volume sold", Intent('total', 'quantity_tons')),
+        ("sales in <month> <year>", Intent('period_total', 'revenue')),
+        ("how much money did we make in <year>", Intent('period_total', 'revenue')),
+        ("income for <year>", Intent('period_total', 'revenue')),
+        ("tons sold in <month> <year>", Intent('period_total', 'quantity_tons')),
+        ("volume shipped in <year>", Intent('period_total', 'quantity_tons')),
+        ("who are our customers", Intent('list', dimension='customer_name')),
+        ("list the clients", Intent('list', dimension='customer_name')),
+        ("which customer categories do we have", Intent('list', dimension='customer_category')),
+        ("what regions do we sell in", Intent('list', dimension='region')),
+        ("best customer in <year>", Intent('top', 'revenue', dimension='customer_name')),
+        ("biggest clients in <month> <year>", Intent('top', 'revenue', dimension='customer_name')),
+        ("best <n> customers in <year>", Intent('top', 'revenue', dimension='customer_name')),
+        ("best performing region in <year>", Intent('top', 'revenue', dimension='region')),
+        ("strongest regions in <year>", Intent('top', 'revenue', dimension='region')),
+        ("best selling products in <year>", Intent('top', 'revenue', dimension='product_type')),
+        ("which maize type sold most in <month> <year>", Intent('top', 'revenue', dimension='product_type')),
+    ]
+
+    def __init__(self, min_similarity=0.35, latency=0.0):
+        self.min_similarity = min_similarity
+        self.latency = latency
+        self.matrix = np.stack([embed(text) for text, _ in self.EXAMPLES])
+
+    def classify(self, masked_question):
+        if self.latency:
+            time.sleep(self.latency)
+        scores = self.matrix @ embed(masked_question)
+        best = int(np.argmax(scores))
+        return self.EXAMPLES[best][1] if scores[best] >= self.min_similarity else None
+
+INTENT_BACKENDS = {'mock': MockModelBackend}
+
+# Register another backend (e.g. a locally hosted LLM client) under a name
+def register_backend(name, backend_class):
+    INTENT_BACKENDS[name] = backend_class
+
+# Semantic cache of intent templates. Exact masked text hits a dict; other
+# questions reuse the template of the most similar cached question when the
+# cosine similarity reaches the threshold. Bounded, least recently used out.
+class SemanticCache:
+    def __init__(self, max_entries=1024, threshold=0.92):
+        self.max_entries = max_entries
+        self.threshold = threshold
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, masked_question):
+        vector = embed(masked_question)
+        with self._lock:
+            if masked_question in self._entries:
+                self._entries.move_to_end(masked_question)
+                return True, self._entries[masked_question][1]
+            if not self._entries:
+                return False, None
+            keys = list(self._entries)
+            scores = np.stack([self._entries[k][0] for k in keys]) @ vector
+            best = int(np.argmax(scores))
+            if scores[best] >= self.threshold:
+                self._entries.move_to_end(keys[best])
+                return True, self._entries[keys[best]][1]
+        return False, None
+
+    def put(self, masked_question, template):
+        with self._lock:
+            self._entries[masked_question] = (embed(masked_question), template)
+            self._entries.move_to_end(masked_question)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+# Routes questions: regex dispatch first, then the semantic cache, then the
+# backend on a bounded worker pool with a per-request timeout. Concurrent
+# requests for the same masked question share one backend call, and results
+# that arrive after a timeout still land in the cache for the next rerun.
+class IntentRouter:
+    def __init__(self, backend, max_workers=2, timeout=2.0, cache=None):
+        self.backend = backend
+        self.timeout = timeout
+        self.cache = cache or SemanticCache()
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='intent')
+        self._inflight = {}
+        self._lock = threading.Lock()
+
+    def classify(self, question, timeout=None):
+        intent = parse_intent(question)
+        if intent:
+            return intent
+        if asks_for_bottom(question):
+            return None
+        masked = mask_question(question)
+        found, template = self.cache.get(masked)
+        if not found:
+            try:
+                template = self._submit(masked).result(timeout=self.timeout if timeout is None else timeout)
+            except TimeoutError:
+                return None
+            except Exception:
+                # A failing backend declines the question; failures are not
+                # cached, so the next ask retries
+                return None
+        return fill_slots(template, extract_slots(question)) if template else None
+
+    # Classify a batch: every backend call is submitted up front and the whole
+    # batch shares one deadline instead of waiting out timeouts one by one
+    def classify_many(self, questions, timeout=None):
+        deadline = time.monotonic() + (self.timeout if timeout is None else timeout)
+        for question in questions:
+            if not parse_intent(question) and not asks_for_bottom(question):
+                masked = mask_question(question)
+                if not self.cache.get(masked)[0]:
+                    self._submit(masked)
+        return [self.classify(q, timeout=max(deadline - time.monotonic(), 0)) for q in questions]
+
+    def _submit(self, masked):
+        with self._lock:
+            future = self._inflight.get(masked)
+            if future is not None:
+                return future
+            future = self._pool.submit(self.backend.classify, masked)
+            self._inflight[masked] = future
+        # Outside the lock: the callback runs immediately if the call already
+        # finished, and _finish takes the lock itself
+        future.add_done_callback(lambda f: self._finish(masked, f))
+        return future
+
+    def _finish(self, masked, future):
+        with self._lock:
+            self._inflight.pop(masked, None)
+        if not future.cancelled() and future.exception() is None:
+            self.cache.put(masked, future.result())
+
+# One router per backend, shared by all sessions
+@st.cache_resource(show_spinner=False)
+def load_intent_router(backend_name):
+    return IntentRouter(INTENT_BACKENDS[backend_name]())
@@ -0,0 +1,31 @@
+import streamlit as st
+import numpy as np
+
+# Headline metrics for a selection of cube rows, computed together from the
+# cube's measure arrays and the filter index's integer codes. Active
+# customers are counted by bincount over customer codes rather than by
+# materialising a filtered frame and calling nunique.
+def compute_kpis(cube, index, rows):
+    total_revenue = cube['revenue'].to_numpy()[rows].sum()
+    total_volume = cube['quantity_tons'].to_numpy()[rows].sum()
+    total_orders = cube['orders'].to_numpy()[rows].sum()
+
+    active_code = index.positions['status'].get('Active')
+    active_customers = 0
+    if active_code is not None:
+        customer_codes = index.codes['customer_name'][rows]
+        is_active = index.codes['status'][rows] == active_code
+        active_customers = int(np.count_nonzero(np.bincount(customer_codes[is_active],
+                                                            minlength=len(index.values['customer_name']))))
+    return {
+        'total_revenue': float(total_revenue),
+        'total_volume': float(total_volume),
+        'total_orders': int(total_orders),
+        'avg_order_size': float(total_volume / total_orders) if total_orders else float('nan'),
+        'active_customers': active_customers,
+    }
+
+# Memoised per dataset version and filter selection (see selection_key)
+@st.cache_data(show_spinner=False, max_entries=1024)
+def load_kpis(version, selection_key, _cube, _index):
+    return compute_kpis(_cube, _index, _index.select(dict(selection_key)))
@@ -0,0 +1,104 @@
+import numpy as np
+
+# Integer period keys, computed once when the data loads so that time
+# bucketing is plain integer grouping instead of per-row date formatting:
+#   month_key   = year * 12 + (month - 1)
+#   quarter_key = year * 4 + (quarter - 1)
+#   week_key    = Monday-based weeks since 1970-01-05
+PERIOD_KEYS = {'Week': 'week_key', 'Month': 'month_key', 'Quarter': 'quarter_key', 'Year': 'year'}
+GRANULARITIES = list(PERIOD_KEYS)
+
+# 1970-01-01 was a Thursday; the first Monday is four days later
+_WEEK_OFFSET_DAYS = 4
+
+def month_keys(year, month):
+    return np.asarray(year, dtype=np.int32) * 12 + (np.asarray(month, dtype=np.int32) - 1)
+
+def add_period_keys(df):
+    df = df.copy()
+    df['month_key'] = month_keys(df['year'], df['month'])
+    df['quarter_key'] = df['month_key'] // 3
+    days = df['date'].to_numpy().astype('datetime64[D]').astype(np.int64)
+    df['week_key'] = ((days - _WEEK_OFFSET_DAYS) // 7).astype(np.int32)
+    return df
+
+# Convert month keys to another granularity (Week cannot be derived from months)
+def from_month_keys(keys, granularity):
+    keys = np.asarray(keys)
+    if granularity == 'Month':
+        return keys
+    if granularity == 'Quarter':
+        return keys // 3
+    if granularity == 'Year':
+        return keys // 12
+    raise ValueError(f"Cannot derive {granularity} buckets from month keys")
+
+# Sum values per distinct key; returns (sorted keys, totals)
+def bucket_totals(keys, values):
+    unique_keys, inverse = np.unique(np.asarray(keys), return_inverse=True)
+    return unique_keys, np.bincount(inverse, weights=np.asarray(values, dtype=np.float64),
+                                    minlength=len(unique_keys))
+
+def _zero_pad(numbers):
+    numbers = np.asarray(numbers).astype(str)
+    # zfill fails on empty arrays (e.g. when no year is selected)
+    return np.char.zfill(numbers, 2) if numbers.size else numbers
+
+# Axis labels for period keys, built with array string ops rather than
+# formatting one Python string per row
+def period_labels(keys, granularity):
+    keys = np.asarray(keys, dtype=np.int64)
+    if granularity == 'Week':
+        starts = np.datetime64('1970-01-01', 'D') + (keys * 7 + _WEEK_OFFSET_DAYS)
+        return np.datetime_as_string(starts, unit='D')
+    if granularity == 'Month':
+        years, months = np.divmod(keys, 12)
+        return np.char.add(np.char.add(years.astype(str), '-'), _zero_pad(months + 1))
+    if granularity == 'Quarter':
+        years, quarters = np.divmod(keys, 4)
+        return np.char.add(np.char.add(years.astype(str), '-Q'), (quarters + 1).astype(str))
+    return keys.astype(str)
+
+# Month-offset index over a frame sorted by month_key. offsets[i] is the first
+# row of month first_key + i, so any run of months is a contiguous row range:
+# totals are a difference of two prefix sums and slices are range views, both
+# independent of the number of rows.
+class MonthIndex:
+    def __init__(self, df, measures=('revenue', 'quantity_tons')):
+        keys = df['month_key'].to_numpy()
+        if len(keys) and np.any(keys[1:] < keys[:-1]):
+            order = np.argsort(keys, kind='stable')
+            df, keys = df.take(order), keys[order]
+        self.df = df
+        self.first_key = int(keys[0]) if len(keys) else 0
+        n_months = int(keys[-1]) - self.first_key + 1 if len(keys) else 0
+        self.offsets = np.searchsorted(keys, np.arange(self.first_key, self.first_key + n_months + 1))
+        # nancumsum skips missing values like DataFrame.sum() does
+        self.cumsums = {m: np.concatenate([[0.0], np.nancumsum(df[m].to_numpy(dtype=np.float64))])
+                        for m in measures}
+
+    # Row range [lo, hi) covering month keys start_key..end_key inclusive
+    def bounds(self, start_key, end_key):
+        n_months = len(self.offsets) - 1
+        lo = min(max(start_key - self.first_key, 0), n_months)
+        hi = min(max(end_key - self.first_key + 1, lo), n_months)
+        return self.offsets[lo], self.offsets[hi]
+
+    def total(self, measure, start_key, end_key):
+        lo, hi = self.bounds(start_key, end_key)
+        return self.cumsums[measure][hi] - self.cumsums[measure][lo]
+
+    def count(self, start_key, end_key):
+        lo, hi = self.bounds(start_key, end_key)
+        return hi - lo
+
+    def slice(self, start_key, end_key):
+        lo, hi = self.bounds(start_key, end_key)
+        return self.df.iloc[lo:hi]
+
+# Month key range of a year, or of one month of it
+def period_range(year, month=None):
+    if month:
+        key = int(month_keys(year, month))
+        return key, key
+    return year * 12, year * 12 + 11
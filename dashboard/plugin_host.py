@@ -0,0 +1,283 @@
+import os
+import ast
+import time
+import signal
+import hashlib
+import threading
+import multiprocessing
+import importlib.util
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import streamlit as st
+
+from dashboard import store
+from dashboard.cube import monthly_totals, read_cube, rollup
+from dashboard.data import load_sales_data
+
+try:
+    import resource
+except ImportError:  # not available on Windows; limits fall back to the timeout
+    resource = None
+
+# Runs plugins out of process. Each plugin is a .py file defining a class with
+# run(dashboard_data); built-in plugins live in dashboard/plugins and uploaded
+# ones in data/plugins. Runs execute on a small process pool with CPU, memory
+# and wall-clock limits, read the dataset by memory-mapping the shared Arrow
+# store instead of receiving a pickled copy, and their results are cached per
+# plugin source and data version.
+#
+# A plugin can declare what it needs with a literal class attribute, e.g.
+#     requires = {'aggregates': ['monthly_totals'], 'columns': ['date', 'revenue']}
+# The host builds each named aggregate once per data version from the shared
+# cube and stores it next to the dataset, and run() receives a dict of those
+# frames (plus 'orders' holding just the listed columns). Plugins without
+# requires receive the full order history as before.
+BUILTIN_DIR = os.path.join(os.path.dirname(__file__), 'plugins')
+PLUGIN_DIR = os.path.join('data', 'plugins')
+
+MAX_WORKERS = 2
+CPU_SECONDS = 30
+MEMORY_MB = 2048
+TIMEOUT_SECONDS = 60
+# Extra time the host waits before killing a worker that ignored its alarm
+KILL_GRACE_SECONDS = 5
+# Workers start from a clean interpreter rather than a fork of the server:
+# a fork inherits the server's heap (which counts against the worker's memory
+# limit) and any lock another server thread held at the time of the fork
+START_METHOD = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+
+class PluginLimitExceeded(Exception):
+    pass
+
+# Aggregates plugins can request: name -> (stored aggregate name, builder from
+# the cube). 'cube' and 'monthly' are the aggregates the dashboard itself keeps.
+PLUGIN_AGGREGATES = {
+    'cube': ('cube', lambda cube: cube),
+    'monthly_totals': ('monthly', monthly_totals),
+    'customer_totals': ('plugin-customer_totals',
+                        lambda cube: rollup(cube, ['customer_name', 'customer_category', 'region'])),
+    'customer_monthly': ('plugin-customer_monthly', lambda cube: rollup(cube, ['year', 'month', 'customer_name'])),
+    'region_monthly': ('plugin-region_monthly', lambda cube: rollup(cube, ['year', 'month', 'region'])),
+    'product_monthly': ('plugin-product_monthly', lambda cube: rollup(cube, ['year', 'month', 'product_type'])),
+}
+
+def plugin_path(plugin_id, info=None):
+    if info and info.get('path'):
+        return info['path']
+    path = os.path.join(BUILTIN_DIR, f'{plugin_id}.py')
+    return path if os.path.exists(path) else None
+
+# Store an uploaded plugin's source; returns its path
+def save_plugin(plugin_id, source):
+    os.makedirs(PLUGIN_DIR, exist_ok=True)
+    path = os.path.join(PLUGIN_DIR, f'{plugin_id}.py')
+    def write(tmp_path):
+        with open(tmp_path, 'wb') as f:
+            f.write(source)
+    return store.atomic_write(path, write)
+
+def _source_stamp(path):
+    stat = os.stat(path)
+    return stat.st_mtime_ns, stat.st_size
+
+# A plugin's declared inputs, read from its source without running it. None
+# for plugins that take the full order history.
+def plugin_requirements(path):
+    with open(path, encoding='utf-8') as f:
+        tree = ast.parse(f.read(), filename=path)
+    for node in tree.body:
+        if not isinstance(node, ast.ClassDef):
+            continue
+        for statement in node.body:
+            if (isinstance(statement, ast.Assign)
+                    and any(isinstance(t, ast.Name) and t.id == 'requires' for t in statement.targets)):
+                declared = ast.literal_eval(statement.value)
+                requires = {'aggregates': list(declared.get('aggregates', [])),
+                            'columns': list(declared.get('columns', []))}
+                unknown = set(requires['aggregates']) - set(PLUGIN_AGGREGATES)
+                if unknown:
+                    raise ValueError(f"Unknown aggregates requested: {', '.join(sorted(unknown))}")
+                return requires
+    return None
+
+# Make sure every requested aggregate is stored for this data version. Built
+# from the cached cube, so each costs a pass over the cube, not the orders,
+# and only the first plugin asking for it pays.
+def prepare_aggregates(names, version):
+    key, revision = version
+    missing = [n for n in names if not store.has_aggregate(key, PLUGIN_AGGREGATES[n][0], revision)]
+    if missing:
+        cube = read_cube(version, lambda: load_sales_data(version=version))
+        for name in missing:
+            stored_name, build = PLUGIN_AGGREGATES[name]
+            if not store.has_aggregate(key, stored_name, revision):
+                store.write_aggregate(key, stored_name, revision, build(cube))
+
+# --- worker side -------------------------------------------------------------
+
+# Plugins loaded in this worker, by path; reloaded when the file changes
+_loaded = {}
+
+def _load_plugin(path):
+    stamp = _source_stamp(path)
+    cached = _loaded.get(path)
+    if cached and cached[0] == stamp:
+        return cached[1]
+    name = 'dashboard_plugin_' + hashlib.sha1(path.encode()).hexdigest()[:12]
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    plugin_class = next((obj for obj in vars(module).values()
+                         if isinstance(obj, type) and obj.__module__ == name and callable(getattr(obj, 'run', None))),
+                        None)
+    if plugin_class is None:
+        raise TypeError(f"{os.path.basename(path)} defines no plugin class with a run() method")
+    plugin = plugin_class()
+    _loaded[path] = (stamp, plugin)
+    return plugin
+
+def _raise_limit(signum, frame):
+    reason = 'time' if signum == signal.SIGALRM else 'CPU'
+    raise PluginLimitExceeded(f"Plugin exceeded its {reason} limit")
+
+# Pool initializer: cap the heap of each worker
+def _init_worker(memory_mb):
+    if resource is not None:
+        hard = resource.getrlimit(resource.RLIMIT_DATA)[1]
+        limit = memory_mb * 2 ** 20
+        resource.setrlimit(resource.RLIMIT_DATA, (limit if hard == resource.RLIM_INFINITY else min(limit, hard), hard))
+        signal.signal(signal.SIGXCPU, _raise_limit)
+    signal.signal(signal.SIGALRM, _raise_limit)
+
+def _plugin_inputs(version, requires):
+    key, revision = version
+    if requires is None:
+        return store.read_dataset(key)
+    inputs = {name: store.read_aggregate(key, PLUGIN_AGGREGATES[name][0], revision)
+              for name in requires['aggregates']}
+    if requires['columns']:
+        inputs['orders'] = store.read_dataset(key, columns=requires['columns'])
+    return inputs
+
+def _run_plugin(path, version, requires, cpu_seconds, timeout):
+    if resource is not None:
+        usage = resource.getrusage(resource.RUSAGE_SELF)
+        hard = resource.getrlimit(resource.RLIMIT_CPU)[1]
+        resource.setrlimit(resource.RLIMIT_CPU, (int(usage.ru_utime + usage.ru_stime) + cpu_seconds, hard))
+    signal.setitimer(signal.ITIMER_REAL, timeout)
+    try:
+        return _load_plugin(path).run(_plugin_inputs(version, requires))
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        if resource is not None:
+            resource.setrlimit(resource.RLIMIT_CPU, (resource.RLIM_INFINITY, hard))
+
+# --- host side ---------------------------------------------------------------
+
+# Stop a pool without waiting for its tasks. ProcessPoolExecutor has no public
+# way to stop a running task, so its workers are killed.
+def _terminate(pool):
+    for process in list(getattr(pool, '_processes', {}).values()):
+        process.terminate()
+    pool.shutdown(wait=False, cancel_futures=True)
+
+class PluginHost:
+    def __init__(self, max_workers=MAX_WORKERS, cpu_seconds=CPU_SECONDS, memory_mb=MEMORY_MB,
+                 timeout=TIMEOUT_SECONDS):
+        self.max_workers = max_workers
+        self.cpu_seconds = cpu_seconds
+        self.memory_mb = memory_mb
+        self.timeout = timeout
+        self._pool = None
+        self._runs = {}
+        self._started = {}
+        self._requirements = {}
+        self._lock = threading.Lock()
+
+    def _executor(self):
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.max_workers,
+                                             mp_context=multiprocessing.get_context(START_METHOD),
+                                             initializer=_init_worker, initargs=(self.memory_mb,))
+        return self._pool
+
+    # Start a run of the plugin against a data version unless one is cached.
+    # Runs for older data versions are dropped.
+    def submit(self, plugin_id, path, version):
+        stamp = _source_stamp(path)
+        run_key = (plugin_id, path, stamp, version)
+        with self._lock:
+            for stale in [k for k in self._runs if k[3] != version]:
+                del self._runs[stale]
+                self._started.pop(stale, None)
+            if run_key in self._runs:
+                return run_key
+        try:
+            requires = self._requires(path, stamp)
+            if requires:
+                prepare_aggregates(requires['aggregates'], version)
+        except Exception as e:
+            future = Future()
+            future.set_exception(e)
+            with self._lock:
+                self._runs.setdefault(run_key, (None, future))
+            return run_key
+        broken = None
+        with self._lock:
+            if run_key not in self._runs:
+                pool = self._executor()
+                try:
+                    future = pool.submit(_run_plugin, path, version, requires, self.cpu_seconds, self.timeout)
+                except BrokenProcessPool:
+                    # A worker died since the last status check; retry once on a fresh pool
+                    broken, self._pool = pool, None
+                    pool = self._executor()
+                    future = pool.submit(_run_plugin, path, version, requires, self.cpu_seconds, self.timeout)
+                self._runs[run_key] = pool, future
+        if broken is not None:
+            _terminate(broken)
+        return run_key
+
+    def _requires(self, path, stamp):
+        if (path, stamp) not in self._requirements:
+            self._requirements[(path, stamp)] = plugin_requirements(path)
+        return self._requirements[(path, stamp)]
+
+    # ('running', None), ('done', result) or ('failed', message). Never blocks.
+    def status(self, run_key):
+        with self._lock:
+            pool, future = self._runs.get(run_key, (None, None))
+        if future is None:
+            return 'failed', 'Plugin was not started'
+        if not future.done():
+            started = self._started.setdefault(run_key, time.monotonic()) if future.running() else None
+            if started is not None and time.monotonic() - started > self.timeout + KILL_GRACE_SECONDS:
+                self._recycle(pool)
+            return 'running', None
+        try:
+            return 'done', future.result()
+        except BrokenProcessPool:
+            self._recycle(pool)
+            return 'failed', 'A plugin worker was killed (limit exceeded); runs on the same pool were lost'
+        except Exception as e:
+            return 'failed', f'{type(e).__name__}: {e}'
+
+    # Forget a run so the next submit starts it again
+    def forget(self, run_key):
+        with self._lock:
+            self._runs.pop(run_key, None)
+            self._started.pop(run_key, None)
+
+    # Kill the workers of a pool with a hung plugin; the next submit starts a
+    # fresh pool
+    def _recycle(self, pool):
+        with self._lock:
+            if pool is not self._pool:
+                return
+            self._pool = None
+        _terminate(pool)
+
+@st.cache_resource(show_spinner=False)
+def load_plugin_host():
+    return PluginHost()
@@ -0,0 +1,31 @@
+import pandas as pd
+
+from dashboard.forecast import DEFAULT_HORIZON, ForecastModel
+from dashboard.periods import period_labels
+
+# Built-in "Predictive Sales Analysis" plugin: fits trend and seasonality to
+# every customer x product series of the monthly cube in one batch and
+# reports the total forecast and the series expected to move most
+class PredictiveSalesAnalysis:
+    requires = {'aggregates': ['cube']}
+
+    def __init__(self):
+        self.name = "Predictive Sales Analysis"
+        self.version = "2.0.0"
+        self.horizon = DEFAULT_HORIZON
+
+    def run(self, inputs):
+        model = ForecastModel(inputs['cube'])
+        keys, revenue = model.forecast(horizon=self.horizon)
+        series = model.series_forecasts().groupby(['customer_name', 'product_type'], observed=True)[
+            ['forecast', 'trend']].sum().reset_index()
+        series.columns = ['Customer', 'Product', 'Next Month Forecast', 'Monthly Trend']
+        return {
+            'Series fitted': len(model.series),
+            f'Forecast for the next {self.horizon} months': pd.DataFrame({
+                'Month': period_labels(keys, 'Month'),
+                'Forecast Revenue': revenue,
+            }),
+            'Fastest declining customer x product series': series.nsmallest(10, 'Monthly Trend'),
+            'Fastest growing customer x product series': series.nlargest(10, 'Monthly Trend'),
+        }
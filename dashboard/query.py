@@ -0,0 +1,261 @@
+import io
+import re
+import sys
+import argparse
+import calendar
+import threading
+import functools
+from collections import OrderedDict, defaultdict, namedtuple
+
+import numpy as np
+import streamlit as st
+import pandas as pd
+
+from dashboard.periods import MonthIndex, period_range
+from dashboard.ranking import RANK_DIMENSIONS, Leaderboards, load_leaderboards
+
+# Structured form of a question. kind is one of 'total', 'period_total',
+# 'list' or 'top'; unused fields are None.
+Intent = namedtuple('Intent', ['kind', 'metric', 'year', 'month', 'dimension', 'rank'],
+                    defaults=[None, None, None, None, None])
+
+MONTHS = r'(jan|feb|mar|apr|may|jun|jul|aug|sep|oct|nov|dec)[a-z]*'
+YEAR = r'(20\d\d)'
+
+def parse_month(month_str):
+    month_map = {
+        'jan': 1, 'january': 1,
+        'feb': 2, 'february': 2,
+        'mar': 3, 'march': 3,
+        'apr': 4, 'april': 4,
+        'may': 5,
+        'jun': 6, 'june': 6,
+        'jul': 7, 'july': 7,
+        'aug': 8, 'august': 8,
+        'sep': 9, 'september': 9,
+        'oct': 10, 'october': 10,
+        'nov': 11, 'november': 11,
+        'dec': 12, 'december': 12
+    }
+    return month_map.get(month_str.lower())
+
+def _period(kind, metric):
+    def build(match):
+        groups = match.groups()
+        if len(groups) == 2:
+            return Intent(kind, metric, year=int(groups[1]), month=parse_month(groups[0]))
+        return Intent(kind, metric, year=int(groups[0]))
+    return build
+
+_RANK_WORDS = {'customer': 'customer_name', 'region': 'region', 'product': 'product_type'}
+
+def _top_n(match):
+    n, noun, month_str, year = match.groups()
+    return Intent('top', 'revenue', year=int(year), month=parse_month(month_str) if month_str else None,
+                  dimension=_RANK_WORDS[noun], rank=int(n))
+
+# Dispatch table, compiled once and tried in order; the first pattern that
+# matches the normalised question decides its intent, so more specific
+# patterns come first
+DISPATCH = [(re.compile(pattern), build) for pattern, build in [
+    (r'(what|how much|show|tell).*total revenue', lambda m: Intent('total', 'revenue')),
+    (r'(what|how much|show|tell).*total.*quantity|total.*tons', lambda m: Intent('total', 'quantity_tons')),
+    # Rankings first: they are more specific than the period totals and often
+    # mention revenue too ("top 5 customers by revenue in 2024")
+    (r'top (\d+) (customer|region|product)s?\b.*?(?:' + MONTHS + r' *)?' + YEAR, _top_n),
+    (r'top customer.*' + YEAR, lambda m: Intent('top', 'revenue', year=int(m.group(1)), dimension='customer_name', rank=1)),
+    (r'region.*highest.*sales.*' + YEAR, lambda m: Intent('top', 'revenue', year=int(m.group(1)), dimension='region', rank=1)),
+    (r'revenue.*' + MONTHS + r' *' + YEAR, _period('period_total', 'revenue')),
+    (r'revenue.*' + YEAR, _period('period_total', 'revenue')),
+    (r'quantity.*' + MONTHS + r' *' + YEAR, _period('period_total', 'quantity_tons')),
+    (r'quantity.*' + YEAR, _period('period_total', 'quantity_tons')),
+    (r'(what|show|list|tell).*all.*customer', lambda m: Intent('list', dimension='customer_name')),
+    (r'(what|show|list|tell).*all.*categor', lambda m: Intent('list', dimension='customer_category')),
+    (r'(what|show|list|tell).*all.*region', lambda m: Intent('list', dimension='region')),
+]]
+
+def normalize_question(question):
+    return ' '.join(question.lower().split())
+
+# Parse a question into an Intent, or None if no pattern matches. Memoised on
+# the normalised text, so repeated questions skip the regexes entirely.
+def parse_intent(question):
+    return _parse_normalized(normalize_question(question))
+
+@functools.lru_cache(maxsize=4096)
+def _parse_normalized(question):
+    for pattern, build in DISPATCH:
+        match = pattern.search(question)
+        if match:
+            return build(match)
+    return None
+
+def _period_label(intent):
+    if intent.month:
+        return f"{calendar.month_abbr[intent.month]} {intent.year}"
+    return str(intent.year)
+
+LIST_HEADERS = {
+    'customer_name': "👥 All Customers ({count}):\n",
+    'customer_category': "📑 All Categories:\n",
+    'region': "🌍 All Regions:\n",
+}
+TOP_HEADERS = {
+    'customer_name': "🏆 Top customer in {period}",
+    'region': "🌍 Top performing region in {period}",
+}
+
+# Sum a measure with a float64 accumulator whatever its storage type (float32
+# sums drift by whole units over millions of rows), skipping missing values
+def _column_total(column):
+    return np.nansum(column.to_numpy(dtype=np.float64))
+
+def _format_total(intent, total):
+    if intent.kind == 'total':
+        if intent.metric == 'revenue':
+            return f"💰 Total Revenue: ${total:,.2f}"
+        return f"⚖️ Total Quantity: {total:,.2f} tons"
+    if intent.metric == 'revenue':
+        return f"📊 Revenue for {_period_label(intent)}: ${total:,.2f}"
+    return f"⚖️ Quantity for {_period_label(intent)}: {total:,.2f} tons"
+
+def _format_list(intent, values):
+    header = LIST_HEADERS[intent.dimension].format(count=len(values))
+    return header + "\n".join([f"- {v}" for v in values])
+
+# leaders: [(value, revenue), ...] largest first
+def _format_top(intent, leaders):
+    if not leaders:
+        return None
+    if intent.rank == 1 and intent.dimension in TOP_HEADERS:
+        header = TOP_HEADERS[intent.dimension].format(period=_period_label(intent))
+        name, value = leaders[0]
+        return f"{header}: {name} (${value:,.2f})"
+    header = f"🏆 Top {intent.rank} {RANK_DIMENSIONS[intent.dimension]} in {_period_label(intent)}:\n"
+    return header + "\n".join([f"{i}. {name} (${value:,.2f})" for i, (name, value) in enumerate(leaders, 1)])
+
+# Answers questions about one version of the sales frame. Answers are cached
+# per intent, so the same question phrased differently, or asked by another
+# user, is served from memory.
+class QueryEngine:
+    def __init__(self, df, cube, leaderboards=None, max_cached=4096):
+        self.df = df
+        self.months = MonthIndex(df)
+        self.leaderboards = leaderboards or Leaderboards(cube)
+        self.max_cached = max_cached
+        self._answers = OrderedDict()
+        self._lock = threading.Lock()
+
+    # parse turns a question into an Intent (or None); defaults to the regex
+    # dispatch table, see dashboard.intents for model-backed parsing
+    def ask(self, question, parse=parse_intent):
+        intent = parse(question)
+        return self.answer(intent) if intent else None
+
+    def answer(self, intent):
+        cached = self._cached([intent])
+        if intent in cached:
+            return cached[intent]
+        response = self._compute(intent)
+        self._remember({intent: response})
+        return response
+
+    # Answer many questions at once. Questions are parsed, grouped by intent
+    # kind, and each group is answered from one aggregation pass shared by
+    # all of its questions. Returns one row per question.
+    def ask_batch(self, questions, parse_many=None):
+        intents = parse_many(questions) if parse_many else [parse_intent(q) for q in questions]
+        answers = self._cached([i for i in intents if i])
+        pending = defaultdict(set)
+        for intent in intents:
+            if intent and intent not in answers:
+                pending[intent.kind].add(intent)
+        computed = {}
+        for kind, group in pending.items():
+            computed.update(getattr(self, f'_batch_{kind}')(group))
+        self._remember(computed)
+        answers.update(computed)
+        return pd.DataFrame({
+            'question': questions,
+            'intent': [i.kind if i else None for i in intents],
+            'answer': [answers.get(i) if i else None for i in intents],
+        })
+
+    def _cached(self, intents):
+        with self._lock:
+            found = {i: self._answers[i] for i in intents if i in self._answers}
+            for intent in found:
+                self._answers.move_to_end(intent)
+        return found
+
+    def _remember(self, answers):
+        with self._lock:
+            self._answers.update(answers)
+            while len(self._answers) > self.max_cached:
+                self._answers.popitem(last=False)
+
+    def _compute(self, intent):
+        if intent.kind == 'total':
+            return _format_total(intent, _column_total(self.df[intent.metric]))
+
+        if intent.kind == 'period_total':
+            return _format_total(intent, self.months.total(intent.metric, *period_range(intent.year, intent.month)))
+
+        if intent.kind == 'list':
+            return _format_list(intent, sorted(self.df[intent.dimension].unique()))
+
+        if intent.kind == 'top':
+            return _format_top(intent, self._leaders(intent))
+
+    # Ranked (value, revenue) pairs for a top-N intent, from the leaderboards
+    def _leaders(self, intent):
+        return self.leaderboards.top(intent.dimension, intent.rank, *period_range(intent.year, intent.month))
+
+    # Batch answers: one pass per metric or dimension, then per-question lookups
+    def _batch_total(self, intents):
+        totals = {m: _column_total(self.df[m]) for m in {i.metric for i in intents}}
+        return {i: _format_total(i, totals[i.metric]) for i in intents}
+
+    def _batch_period_total(self, intents):
+        return {i: _format_total(i, self.months.total(i.metric, *period_range(i.year, i.month)))
+                for i in intents}
+
+    def _batch_list(self, intents):
+        values = {d: sorted(self.df[d].unique()) for d in {i.dimension for i in intents}}
+        return {i: _format_list(i, values[i.dimension]) for i in intents}
+
+    def _batch_top(self, intents):
+        return {i: _format_top(i, self._leaders(i)) for i in intents}
+
+# One engine per dataset version, shared by all sessions
+@st.cache_resource(show_spinner=False, max_entries=2)
+def load_query_engine(version, _df, _cube):
+    return QueryEngine(_df, _cube, leaderboards=load_leaderboards(version, _cube))
+
+# Questions from a text file (one per line) or a CSV with a 'question' column
+def read_questions(text, filename=''):
+    if filename.lower().endswith('.csv'):
+        table = pd.read_csv(io.StringIO(text))
+        column = 'question' if 'question' in table.columns else table.columns[0]
+        return [str(q) for q in table[column].dropna()]
+    return [line.strip() for line in text.splitlines() if line.strip()]
+
+# Batch entry point for scheduled report jobs:
+#   python -m dashboard.query questions.txt --out answers.csv
+def main(argv=None):
+    from dashboard.cube import build_cube
+    from dashboard.data import load_sales_data
+
+    parser = argparse.ArgumentParser(description="Answer a file of questions against the sales data.")
+    parser.add_argument('questions', help="text file with one question per line, or a CSV with a 'question' column")
+    parser.add_argument('--out', help="CSV file for the answers (default: stdout)")
+    args = parser.parse_args(argv)
+
+    with open(args.questions) as f:
+        questions = read_questions(f.read(), args.questions)
+    df = load_sales_data()
+    result = QueryEngine(df, build_cube(df)).ask_batch(questions)
+    result.to_csv(args.out or sys.stdout, index=False)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,112 @@
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from dashboard.incremental import grow_months, load_incremental
+from dashboard.periods import month_keys
+
+# Dimensions that can be ranked, with the noun used in questions and answers
+RANK_DIMENSIONS = {'customer_name': 'customers', 'region': 'regions', 'product_type': 'products'}
+
+# Per-period leaderboards. For every rankable dimension this keeps a
+# (month x value) matrix of revenue and order counts, built from the monthly
+# cube, plus prefix sums over months, so the totals of every value over any
+# run of months is one row difference. Top-N selection then uses
+# argpartition over those totals instead of sorting a groupby result.
+class Leaderboards:
+    def __init__(self, cube, dimensions=tuple(RANK_DIMENSIONS)):
+        self.dimensions = dimensions
+        self.first_key = None
+        self.n_months = 0
+        self.values = {dim: [] for dim in dimensions}
+        self.revenue = {dim: np.zeros((0, 0)) for dim in dimensions}
+        self.orders = {dim: np.zeros((0, 0), dtype=np.int64) for dim in dimensions}
+        self.update(cube)
+
+    def copy(self):
+        other = object.__new__(Leaderboards)
+        other.dimensions = self.dimensions
+        other.first_key, other.n_months = self.first_key, self.n_months
+        other.values = {dim: list(v) for dim, v in self.values.items()}
+        other.revenue = {dim: m.copy() for dim, m in self.revenue.items()}
+        other.orders = {dim: m.copy() for dim, m in self.orders.items()}
+        other._cum_revenue, other._cum_orders = self._cum_revenue, self._cum_orders
+        return other
+
+    # Add a cube of new orders. Costs the size of the batch plus the size of
+    # the matrices, never a pass over the order history.
+    def update(self, cube):
+        if len(cube):
+            keys = month_keys(cube['year'], cube['month'])
+            self._grow_months(int(keys.min()), int(keys.max()))
+            rows = keys - self.first_key
+            for dim in self.dimensions:
+                cols = self._value_columns(dim, cube[dim])
+                n_values = len(self.values[dim])
+                flat = rows * n_values + cols
+                size = self.n_months * n_values
+                self.revenue[dim] += np.bincount(flat, weights=cube['revenue'].to_numpy(dtype=np.float64),
+                                                 minlength=size).reshape(self.n_months, n_values)
+                self.orders[dim] += np.bincount(flat, weights=cube['orders'].to_numpy(),
+                                                minlength=size).astype(np.int64).reshape(self.n_months, n_values)
+        self._cum_revenue = {dim: self._prefix(m) for dim, m in self.revenue.items()}
+        self._cum_orders = {dim: self._prefix(m) for dim, m in self.orders.items()}
+        return self
+
+    @staticmethod
+    def _prefix(matrix):
+        return np.vstack([np.zeros((1, matrix.shape[1]), dtype=matrix.dtype), np.cumsum(matrix, axis=0)])
+
+    def _grow_months(self, low, high):
+        self.first_key, self.n_months, pad = grow_months(self.first_key, self.n_months, low, high)
+        if any(pad):
+            for dim in self.dimensions:
+                self.revenue[dim] = np.pad(self.revenue[dim], (pad, (0, 0)))
+                self.orders[dim] = np.pad(self.orders[dim], (pad, (0, 0)))
+
+    # Column of each value, appending columns for values not seen before
+    def _value_columns(self, dim, column):
+        codes, uniques = pd.factorize(column)
+        lookup = {value: i for i, value in enumerate(self.values[dim])}
+        new = [value for value in uniques if value not in lookup]
+        if new:
+            for value in new:
+                lookup[value] = len(self.values[dim])
+                self.values[dim].append(value)
+            self.revenue[dim] = np.pad(self.revenue[dim], ((0, 0), (0, len(new))))
+            self.orders[dim] = np.pad(self.orders[dim], ((0, 0), (0, len(new))))
+        return np.array([lookup[value] for value in uniques], dtype=np.int64)[codes]
+
+    # Revenue and order count of every value of dim over month keys
+    # start_key..end_key (aligned with self.values[dim])
+    def totals(self, dim, start_key, end_key):
+        if self.first_key is None:
+            return np.zeros(0), np.zeros(0, dtype=np.int64)
+        lo = min(max(start_key - self.first_key, 0), self.n_months)
+        hi = min(max(end_key - self.first_key + 1, lo), self.n_months)
+        return (self._cum_revenue[dim][hi] - self._cum_revenue[dim][lo],
+                self._cum_orders[dim][hi] - self._cum_orders[dim][lo])
+
+    # Last month key with orders
+    @property
+    def last_key(self):
+        return None if self.first_key is None else self.first_key + self.n_months - 1
+
+    # Top n values of dim by revenue over month keys start_key..end_key, as a
+    # list of (value, revenue), largest first. Values without orders in the
+    # period are not ranked.
+    def top(self, dim, n, start_key, end_key):
+        totals, orders = self.totals(dim, start_key, end_key)
+        present = np.flatnonzero(orders > 0)
+        if not len(present) or n < 1:
+            return []
+        k = min(n, len(present))
+        best = present[np.argpartition(-totals[present], k - 1)[:k]]
+        best = best[np.argsort(-totals[best], kind='stable')]
+        return [(self.values[dim][i], totals[i]) for i in best]
+
+# Leaderboards of a data version, advanced from the previous version's by the
+# parts appended since rather than rebuilt
+@st.cache_resource(show_spinner=False, max_entries=2)
+def load_leaderboards(version, _cube):
+    return load_incremental(version, _cube, Leaderboards, lambda boards, cube: boards.copy().update(cube))
@@ -0,0 +1,101 @@
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import streamlit as st
+
+# Runs queries off the Streamlit script thread. Each session owns a
+# QueryRunner holding at most one live job; submitting a different query
+# cancels the previous one. Jobs run on a pool shared by all sessions and
+# report progress and partial results that the page polls while it waits.
+# Threads rather than processes, because the engine and its caches live in
+# this process.
+
+class QueryCancelled(Exception):
+    pass
+
+class QueryJob:
+    def __init__(self, key):
+        self.key = key
+        self.progress = 0.0
+        self.message = ''
+        self.partial = None
+        self.future = None
+        self._cancel = threading.Event()
+
+    # Called by the work function; raises QueryCancelled once superseded so
+    # long loops stop at their next checkpoint
+    def report(self, progress, message='', partial=None):
+        if self._cancel.is_set():
+            raise QueryCancelled(self.key)
+        self.progress = progress
+        self.message = message
+        if partial is not None:
+            self.partial = partial
+
+    def cancel(self):
+        self._cancel.set()
+        if self.future is not None:
+            self.future.cancel()
+
+    @property
+    def cancelled(self):
+        return self._cancel.is_set()
+
+    def done(self):
+        return self.future.done()
+
+    def result(self, timeout=None):
+        return self.future.result(timeout=timeout)
+
+class QueryRunner:
+    def __init__(self, pool):
+        self.pool = pool
+        self.job = None
+
+    # Start fn(job, *args) unless the same query is already running or
+    # finished; a different key cancels the current job
+    def submit(self, key, fn, *args):
+        if self.job is not None and self.job.key == key and not self.job.cancelled:
+            return self.job
+        self.cancel()
+        job = QueryJob(key)
+        job.future = self.pool.submit(fn, job, *args)
+        self.job = job
+        return job
+
+    def cancel(self):
+        if self.job is not None and not self.job.done():
+            self.job.cancel()
+        self.job = None
+
+@st.cache_resource(show_spinner=False)
+def load_query_pool(max_workers=4):
+    return ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='query')
+
+# The runner for the current session; pool defaults to the shared query pool
+def session_runner(name='query_runner', pool=None):
+    if name not in st.session_state:
+        st.session_state[name] = QueryRunner(pool or load_query_pool())
+    return st.session_state[name]
+
+# Wait for a job, showing its progress and (optionally) its partial results.
+# Returns immediately when the job already finished. While this polls, a
+# rerun triggered by new input stops the script and the next run's submit
+# cancels the superseded job.
+def wait_for(job, render_partial=None, poll_interval=0.1):
+    if job.done():
+        return job.result()
+    bar = st.progress(0.0, text='Working...')
+    partial = st.empty()
+    shown = None
+    while not job.done():
+        bar.progress(min(job.progress, 1.0), text=job.message or 'Working...')
+        if render_partial and job.partial is not None and job.partial is not shown:
+            shown = job.partial
+            with partial.container():
+                render_partial(shown)
+        time.sleep(poll_interval)
+    bar.empty()
+    partial.empty()
+    return job.result()
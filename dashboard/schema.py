@@ -0,0 +1,41 @@
+import pandas as pd
+
+# Declared storage types for the sales frame. Dimensions are categoricals,
+# calendar fields and period keys use the smallest integer that holds them,
+# and per-order measures are float32. Revenue stays float64 because it is
+# summed into dollar totals across the whole history.
+SALES_SCHEMA = {
+    'date': 'datetime64[ns]',
+    'customer_name': 'category',
+    'customer_category': 'category',
+    'region': 'category',
+    'product_type': 'category',
+    'status': 'category',
+    'month': 'int8',
+    'year': 'int16',
+    'month_key': 'int16',
+    'quarter_key': 'int16',
+    'week_key': 'int16',
+    'quantity_tons': 'float32',
+    'price_per_ton': 'float32',
+    'revenue': 'float64',
+}
+
+# Cast the columns of df that appear in the schema; a no-op for columns that
+# already have the declared type
+def apply_schema(df, schema=SALES_SCHEMA):
+    casts = {col: dtype for col, dtype in schema.items()
+             if col in df.columns and df[col].dtype != dtype}
+    return df.astype(casts) if casts else df
+
+# Resident memory per column, largest first
+def memory_report(df):
+    usage = df.memory_usage(deep=True, index=False)
+    report = pd.DataFrame({
+        'column': usage.index,
+        'dtype': [str(df[col].dtype) for col in usage.index],
+        'bytes': usage.values,
+    })
+    report['MB'] = (report['bytes'] / 2**20).round(3)
+    report['share'] = (report['bytes'] / report['bytes'].sum()).round(3)
+    return report.sort_values('bytes', ascending=False, ignore_index=True)
@@ -0,0 +1,166 @@
+import os
+import json
+import glob
+import shutil
+import tempfile
+import threading
+import pyarrow as pa
+import pyarrow.ipc as ipc
+
+# Shared on-disk copy of the sales data. Each dataset key gets its own
+# directory of Arrow IPC parts which every process memory-maps instead of
+# unpickling a private copy. A small manifest lists the committed parts and a
+# revision number that is bumped on every append, so readers can key their
+# caches on (key, revision) and never see a half-written dataset.
+STORE_DIR = os.path.join('data', 'store')
+MANIFEST = 'manifest.json'
+
+# Appends are serialised within a process; ingestion is expected to run from
+# a single process at a time
+_append_lock = threading.Lock()
+
+def dataset_dir(key):
+    return os.path.join(STORE_DIR, key)
+
+def part_path(key, part_number):
+    return os.path.join(dataset_dir(key), f'part-{part_number:05d}.arrow')
+
+def _manifest_path(key):
+    return os.path.join(dataset_dir(key), MANIFEST)
+
+def read_manifest(key):
+    try:
+        with open(_manifest_path(key)) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+def has_dataset(key):
+    return read_manifest(key) is not None
+
+def dataset_revision(key):
+    manifest = read_manifest(key)
+    return manifest['revision'] if manifest else None
+
+def dataset_parts(key):
+    manifest = read_manifest(key) or {'parts': []}
+    return [os.path.join(dataset_dir(key), name) for name in manifest['parts']]
+
+# Write via a temp file + rename so readers never see a half-written file and
+# concurrent writers cannot interleave. write(tmp_path) fills the temp file.
+def atomic_write(path, write):
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+    os.close(fd)
+    try:
+        write(tmp_path)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+    return path
+
+def _write_ipc(table, path):
+    def write(tmp_path):
+        with pa.OSFile(tmp_path, 'wb') as sink:
+            with ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+    return atomic_write(path, write)
+
+def _write_manifest(key, parts, revision):
+    def write(tmp_path):
+        with open(tmp_path, 'w') as f:
+            json.dump({'parts': parts, 'revision': revision}, f)
+    return atomic_write(_manifest_path(key), write)
+
+def _to_table(df, schema=None):
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    return table.select(schema.names).cast(schema) if schema is not None else table
+
+# Write one part of a dataset. Parts only become visible once committed.
+def write_part(key, part_number, df):
+    os.makedirs(dataset_dir(key), exist_ok=True)
+    return _write_ipc(_to_table(df), part_path(key, part_number))
+
+# Make parts 0..n_parts-1 the contents of the dataset at revision 0
+def commit_dataset(key, n_parts):
+    _write_manifest(key, [os.path.basename(part_path(key, i)) for i in range(n_parts)], 0)
+
+# Store the base dataset for a key. A no-op when another session or process
+# already published it.
+def publish_dataset(df, key):
+    if not has_dataset(key):
+        write_part(key, 0, df)
+        commit_dataset(key, 1)
+    return dataset_dir(key)
+
+# Append rows as a new part and bump the revision. The rows are cast to the
+# stored schema so every part stays compatible. before_commit(revision) runs
+# after the part is written but before it becomes visible, which lets callers
+# store derived aggregates for the new revision first. Returns the revision.
+def append_part(key, df, before_commit=None):
+    with _append_lock:
+        manifest = read_manifest(key)
+        if manifest is None:
+            raise FileNotFoundError(f"No stored dataset for key {key!r}")
+        schema = ipc.open_file(pa.memory_map(dataset_parts(key)[0], 'r')).schema
+        part_number = len(manifest['parts'])
+        _write_ipc(_to_table(df, schema), part_path(key, part_number))
+        revision = manifest['revision'] + 1
+        if before_commit:
+            before_commit(revision)
+        _write_manifest(key, manifest['parts'] + [os.path.basename(part_path(key, part_number))], revision)
+        return revision
+
+# Memory-map every committed part of a dataset. Fixed-width columns are handed
+# to pandas without copying; only string columns have to be materialised, and
+# only the requested columns are converted at all.
+def read_dataset(key, columns=None):
+    tables = [ipc.open_file(pa.memory_map(path, 'r')).read_all() for path in dataset_parts(key)]
+    if not tables:
+        raise FileNotFoundError(f"No stored dataset for key {key!r}")
+    table = pa.concat_tables(tables)
+    if columns is not None:
+        table = table.select(columns)
+    return table.to_pandas(split_blocks=True)
+
+# Rows appended after the given revision (each append adds one part)
+def read_parts_since(key, revision):
+    manifest = read_manifest(key)
+    new_parts = manifest['revision'] - revision
+    paths = dataset_parts(key)[len(manifest['parts']) - new_parts:] if new_parts > 0 else []
+    tables = [ipc.open_file(pa.memory_map(path, 'r')).read_all() for path in paths]
+    if not tables:
+        return ipc.open_file(pa.memory_map(dataset_parts(key)[0], 'r')).schema.empty_table().to_pandas()
+    return pa.concat_tables(tables).to_pandas(split_blocks=True)
+
+# Aggregates derived from a dataset (e.g. the monthly cube) are stored next
+# to it, one file per revision, so they can be updated incrementally
+def _aggregate_path(key, name, revision):
+    return os.path.join(dataset_dir(key), f'{name}-r{revision:05d}.arrow')
+
+def write_aggregate(key, name, revision, df):
+    path = _write_ipc(_to_table(df), _aggregate_path(key, name, revision))
+    # Keep the previous revision for readers that have not seen the new one yet
+    for older in glob.glob(os.path.join(dataset_dir(key), f'{name}-r*.arrow')):
+        if int(older[-len('00000.arrow'):-len('.arrow')]) < revision - 1:
+            os.remove(older)
+    return path
+
+def has_aggregate(key, name, revision):
+    return os.path.exists(_aggregate_path(key, name, revision))
+
+def read_aggregate(key, name, revision):
+    path = _aggregate_path(key, name, revision)
+    if not os.path.exists(path):
+        return None
+    return ipc.open_file(pa.memory_map(path, 'r')).read_all().to_pandas()
+
+# Drop builds superseded by keep: datasets for which same_build(name) holds.
+# Datasets with ingested batches (revision above 0) are never dropped, so
+# appended orders survive a rebuild.
+def prune_datasets(keep, same_build):
+    if not os.path.isdir(STORE_DIR):
+        return
+    for name in os.listdir(STORE_DIR):
+        if name != keep and same_build(name) and not dataset_revision(name):
+            shutil.rmtree(os.path.join(STORE_DIR, name), ignore_errors=True)
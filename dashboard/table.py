@@ -0,0 +1,42 @@
+import streamlit as st
+import numpy as np
+
+# Paged table component. Searching, sorting and paging run on the numeric
+# table in Python; only the rows of the visible page are formatted and sent
+# to the browser.
+#   formats: {column: format string} applied to the visible page only
+def paged_table(table, key, page_size=50, search_columns=None, formats=None,
+                default_sort=None, descending=True):
+    search_columns = search_columns or []
+    formats = formats or {}
+
+    control_cols = st.columns([3, 2, 1, 1])
+    with control_cols[0]:
+        search = st.text_input("Search", key=f"{key}_search",
+                               placeholder=f"Search {', '.join(search_columns)}") if search_columns else ""
+    with control_cols[1]:
+        columns = list(table.columns)
+        sort_column = st.selectbox("Sort by", columns, key=f"{key}_sort",
+                                   index=columns.index(default_sort) if default_sort in columns else 0)
+    with control_cols[2]:
+        sort_descending = st.toggle("Descending", value=descending, key=f"{key}_descending")
+
+    if search:
+        matches = np.zeros(len(table), dtype=bool)
+        for col in search_columns:
+            matches |= table[col].astype(str).str.contains(search, case=False, regex=False).to_numpy()
+        table = table[matches]
+    table = table.sort_values(sort_column, ascending=not sort_descending, kind='stable')
+
+    n_pages = max(1, -(-len(table) // page_size))
+    with control_cols[3]:
+        page = st.number_input("Page", min_value=1, max_value=n_pages, value=1, step=1, key=f"{key}_page")
+    page = min(page, n_pages)
+    start = (page - 1) * page_size
+    visible = table.iloc[start:start + page_size].copy()
+    for col, fmt in formats.items():
+        visible[col] = visible[col].map(fmt.format)
+
+    st.dataframe(visible, use_container_width=True, hide_index=True)
+    st.caption(f"Rows {min(start + 1, len(table)):,}–{start + len(visible):,} of {len(table):,} "
+               f"(page {page} of {n_pages})")
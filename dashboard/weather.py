@@ -0,0 +1,164 @@
+import os
+import glob
+from datetime import date
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from dashboard import store
+
+# Regional weather for the Weather Data Integration plugin. Daily series are
+# read from one CSV per region in data/weather (date, temperature_c,
+# rainfall_mm) into a region + date index. Orders are joined to the latest
+# reading on or before their date with a sorted as-of lookup per region, once
+# per data version, and correlations are derived from per (region, year)
+# moment sums, so any region and period is answered without another pass
+# over the orders.
+WEATHER_DIR = os.path.join('data', 'weather')
+WEATHER_MEASURES = {'temperature_c': 'Temperature (°C)', 'rainfall_mm': 'Rainfall (mm)'}
+# Readings older than this are not joined to an order
+WEATHER_TOLERANCE = np.timedelta64(3, 'D')
+
+# Demo readings for regions without a weather file: yearly temperature cycle
+# plus a regional offset, and showery rainfall
+def generate_weather(region, start, end, seed=42):
+    rng = np.random.default_rng([seed, sum(region.encode())])
+    dates = pd.date_range(start, end, freq='D')
+    day = dates.dayofyear.to_numpy()
+    offset = {'North': -3.0, 'South': 4.0, 'East': 1.0, 'West': -1.0}.get(region, 0.0)
+    temperature = 15 + offset + 9 * np.sin(2 * np.pi * (day - 100) / 365.25) + rng.normal(0, 2.5, len(dates))
+    rainfall = np.where(rng.random(len(dates)) < 0.3, rng.gamma(1.5, 6.0, len(dates)), 0.0)
+    return pd.DataFrame({'date': dates, 'temperature_c': temperature.round(1), 'rainfall_mm': rainfall.round(1)})
+
+def weather_path(region):
+    return os.path.join(WEATHER_DIR, f'{region}.csv')
+
+# Marks a weather file as generated demo data, which may be extended; files
+# supplied by the user are never touched
+def _demo_marker(region):
+    return os.path.join(WEATHER_DIR, f'{region}.demo')
+
+def _write_weather(region, frame):
+    store.atomic_write(weather_path(region), lambda tmp_path: frame.to_csv(tmp_path, index=False))
+
+# Last reading of each weather file, by path; re-read when the file changes
+_last_dates = {}
+
+def _last_date(path):
+    mtime = os.stat(path).st_mtime_ns
+    cached = _last_dates.get(path)
+    if not cached or cached[0] != mtime:
+        cached = _last_dates[path] = mtime, pd.read_csv(path, usecols=['date'], parse_dates=['date'])['date'].max()
+    return cached[1]
+
+# Write demo files for the given regions that have no weather file yet, and
+# extend demo files that end before end (the latest order date, by default
+# today) with readings for the missing days
+def ensure_weather_files(regions, start, end=None):
+    os.makedirs(WEATHER_DIR, exist_ok=True)
+    end = pd.Timestamp(end or date.today()).normalize()
+    for region in regions:
+        if not os.path.exists(weather_path(region)):
+            open(_demo_marker(region), 'w').close()
+            _write_weather(region, generate_weather(region, start, end))
+        elif os.path.exists(_demo_marker(region)) and _last_date(weather_path(region)) < end:
+            frame = pd.read_csv(weather_path(region), parse_dates=['date'])
+            missing = generate_weather(region, frame['date'].max() + pd.Timedelta(days=1), end)
+            _write_weather(region, pd.concat([frame, missing], ignore_index=True))
+
+# Identifies the current set of weather files; cached results key on it
+def weather_stamp():
+    return tuple(sorted((os.path.basename(p), os.stat(p).st_mtime_ns)
+                        for p in glob.glob(os.path.join(WEATHER_DIR, '*.csv'))))
+
+# Daily readings of every region, sorted by region then date. bounds[i] to
+# bounds[i + 1] are the rows of regions[i].
+class WeatherIndex:
+    def __init__(self, frames):
+        self.regions = sorted(frames)
+        frames = [frames[r].sort_values('date') for r in self.regions]
+        self.bounds = np.cumsum([0] + [len(f) for f in frames])
+        self.dates = np.concatenate([f['date'].to_numpy(dtype='datetime64[ns]') for f in frames]) if frames \
+            else np.zeros(0, dtype='datetime64[ns]')
+        self.values = {m: np.concatenate([f[m].to_numpy(dtype=np.float32) for f in frames]) if frames
+                       else np.zeros(0, dtype=np.float32) for m in WEATHER_MEASURES}
+
+    # As-of join: the reading of each (region, date) pair at or before the
+    # date, within the tolerance; NaN where there is none
+    def asof(self, regions, dates, tolerance=WEATHER_TOLERANCE):
+        dates = np.asarray(dates, dtype='datetime64[ns]')
+        codes = pd.Categorical(regions, categories=self.regions).codes
+        result = {m: np.full(len(dates), np.nan, dtype=np.float32) for m in WEATHER_MEASURES}
+        order = np.argsort(codes, kind='stable')
+        starts = np.searchsorted(codes[order], np.arange(len(self.regions) + 1))
+        for i in range(len(self.regions)):
+            rows = order[starts[i]:starts[i + 1]]
+            lo, hi = self.bounds[i], self.bounds[i + 1]
+            if not len(rows) or lo == hi:
+                continue
+            pos = np.searchsorted(self.dates[lo:hi], dates[rows], side='right') - 1
+            found = pos >= 0
+            pos = lo + np.maximum(pos, 0)
+            found &= dates[rows] - self.dates[pos] <= tolerance
+            for m, values in self.values.items():
+                result[m][rows[found]] = values[pos[found]]
+        return result
+
+def read_weather(regions):
+    frames = {}
+    for region in regions:
+        if os.path.exists(weather_path(region)):
+            frames[region] = pd.read_csv(weather_path(region), parse_dates=['date'])
+    return WeatherIndex(frames)
+
+# Weather for the given regions from start to end, demo files being written
+# or extended as needed
+def load_weather(regions, start, end=None):
+    regions = tuple(sorted(str(r) for r in regions))
+    ensure_weather_files(regions, start, end)
+    return _load_weather_index(regions, weather_stamp())
+
+@st.cache_resource(show_spinner=False, max_entries=2)
+def _load_weather_index(regions, stamp):
+    return read_weather(regions)
+
+# Per (region, year) sums of n, x, y, x^2, y^2 and xy for order revenue
+# against each weather measure. Sums over any set of years combine exactly.
+def weather_moments(df, weather):
+    joined = weather.asof(df['region'].astype(str).to_numpy(), df['date'].to_numpy())
+    revenue = df['revenue'].to_numpy(dtype=np.float64)
+    columns = {'region': df['region'].astype(str).to_numpy(), 'year': df['year'].to_numpy()}
+    for m in WEATHER_MEASURES:
+        x = joined[m].astype(np.float64)
+        ok = ~np.isnan(x)
+        y = np.where(ok, revenue, 0.0)
+        x = np.where(ok, x, 0.0)
+        columns.update({f'{m}_n': ok.astype(np.int64), f'{m}_x': x, f'{m}_y': y, f'{m}_xx': x * x,
+                        f'{m}_yy': y * y, f'{m}_xy': x * y})
+    return pd.DataFrame(columns).groupby(['region', 'year']).sum().reset_index()
+
+@st.cache_resource(show_spinner=False, max_entries=2)
+def load_weather_moments(version, stamp, _df, _weather):
+    return weather_moments(_df, _weather)
+
+# Pearson correlation of order revenue with each weather measure, per region,
+# over the given years (all years when None)
+def weather_correlations(moments, years=None):
+    if years is not None:
+        moments = moments[moments['year'].isin(years)]
+    sums = moments.drop(columns='year').groupby('region').sum()
+    table = pd.DataFrame(index=sums.index)
+    for m, label in WEATHER_MEASURES.items():
+        n, x, y = sums[f'{m}_n'], sums[f'{m}_x'], sums[f'{m}_y']
+        cov = sums[f'{m}_xy'] - x * y / n
+        var_x = sums[f'{m}_xx'] - x * x / n
+        var_y = sums[f'{m}_yy'] - y * y / n
+        table[label] = (cov / np.sqrt(var_x * var_y)).where((n > 2) & (var_x > 0) & (var_y > 0))
+    table['Orders'] = sums[f'{next(iter(WEATHER_MEASURES))}_n']
+    return table.reset_index().rename(columns={'region': 'Region'})
+
+# Correlations for a data version and period, computed once per period
+@st.cache_data(show_spinner=False, max_entries=64)
+def load_weather_correlations(version, stamp, years, _moments):
+    return weather_correlations(_moments, years)
@@ -1,12 +1,19 @@
 import streamlit as st
 import pandas as pd
-import numpy as np
 import plotly.express as px
 import plotly.graph_objects as go
 from datetime import datetime, timedelta
-import pickle
 import os
 
+from dashboard.competitors import (load_competitor_data, load_competitor_summary, load_movement_annotations,
+                                   load_price_lines, summarize_competitors)
+from dashboard.data import dataset_fingerprint, dataset_version, load_sales_data
+from dashboard.downsample import DOWNSAMPLE_METHODS
+
+# Approximate rendered width of the price chart; each competitor line is
+# capped at one point per pixel
+PRICE_CHART_WIDTH_PX = 1200
+
 # Page configuration
 st.set_page_config(
     page_title="Competitor Analysis",
@@ -14,129 +21,17 @@ st.set_page_config(
     layout="wide"
 )
 
-# Load data from pickle
-try:
-    with open('data/dashboard_data.pkl', 'rb') as f:
-        data_dict = pickle.load(f)
-        main_df = data_dict['original_df']
-        main_df_filtered = data_dict['filtered_df']
-except FileNotFoundError:
-    st.error("Please run the main dashboard first to generate the data.")
-    st.stop()
-
-# Generate competitor data
-def generate_competitor_data(main_df):
-    np.random.seed(42)  # Same seed as main page for consistency
-    
-    # Define major competitors with their characteristics
-    competitors = {
-        'MaizeCorp Elite': {
-            'base_price': 290,
-            'price_strategy': 'Premium',
-            'service_quality': 9.2,
-            'target_customers': ['Global Grain Corp', 'International Food Trade']
-        },
-        'GrainGiants Int': {
-            'base_price': 275,
-            'price_strategy': 'Aggressive',
-            'service_quality': 8.5,
-            'target_customers': ['Maritime Traders Inc', 'Export Trading Group']
-        },
-        'AgriGlobal Pro': {
-            'base_price': 285,
-            'price_strategy': 'Balanced',
-            'service_quality': 8.8,
-            'target_customers': ['World Food Network', 'Continental Supplies']
-        },
-        'FarmFresh Hub': {
-            'base_price': 270,
-            'price_strategy': 'Economy',
-            'service_quality': 8.0,
-            'target_customers': ['Local Grain Exchange', 'Urban Bulk Supplies']
-        },
-        'EcoGrain Plus': {
-            'base_price': 295,
-            'price_strategy': 'Organic Focus',
-            'service_quality': 9.0,
-            'target_customers': ['Digital Food Exchange', 'E-Commerce Foods']
-        }
-    }
-    
-    # Create date range matching main data
-    dates = pd.date_range(start=main_df['date'].min(), end=main_df['date'].max(), freq='M')
-    
-    # Define customer movement events
-    customer_movements = {
-        'Global Grain Corp': {
-            'new_supplier': 'MaizeCorp Elite',
-            'date': '2024-01-15',
-            'reason': 'Price advantage: 15% lower with bulk commitment',
-            'impact': 'High',
-            'annual_value': '$2.5M'
-        },
-        'International Food Trade': {
-            'new_supplier': 'GrainGiants Int',
-            'date': '2023-09-01',
-            'reason': 'Aggressive pricing and flexible payment terms',
-            'impact': 'Medium',
-            'annual_value': '$1.8M'
-        },
-        'Maritime Traders Inc': {
-            'new_supplier': 'AgriGlobal Pro',
-            'date': '2024-02-01',
-            'reason': 'Integrated logistics solution',
-            'impact': 'Medium',
-            'annual_value': '$1.2M'
-        },
-        'Export Trading Group': {
-            'new_supplier': 'FarmFresh Hub',
-            'date': '2023-11-15',
-            'reason': 'Regional warehouse access and lower prices',
-            'impact': 'High',
-            'annual_value': '$2.1M'
-        }
-    }
-
-    data = []
-    # Generate monthly data for each competitor
-    for date in dates:
-        for comp_name, comp_info in competitors.items():
-            base_price = comp_info['base_price']
-            
-            # Add seasonal variation
-            month_factor = 1 + 0.1 * np.sin(date.month * np.pi / 6)
-            
-            # Add strategic price changes
-            if comp_name in ['MaizeCorp Elite', 'GrainGiants Int'] and date >= pd.Timestamp('2023-09-01'):
-                base_price *= 0.85  # 15% reduction for aggressive competitors
-            
-            # Calculate metrics
-            price = base_price * month_factor * (1 + 0.02 * np.random.randn())
-            market_share = np.random.normal(20, 2)
-            service_score = comp_info['service_quality'] + np.random.normal(0, 0.1)
-            
-            data.append({
-                'date': date,
-                'competitor': comp_name,
-                'price_per_ton': price,
-                'market_share': market_share,
-                'service_quality': service_score,
-                'price_strategy': comp_info['price_strategy']
-            })
-    
-    df = pd.DataFrame(data)
-    
-    # Add customer movement annotations
-    df['events'] = ''
-    for customer, movement in customer_movements.items():
-        mask = (df['date'] == pd.Timestamp(movement['date'])) & \
-               (df['competitor'] == movement['new_supplier'])
-        df.loc[mask, 'events'] = f"Gained {customer}: {movement['reason']}"
-    
-    return df, customer_movements, competitors
-
-# Generate data
-df_competitor, customer_movements, competitors_info = generate_competitor_data(main_df)
+# Load data from the shared store
+data_version = dataset_version()
+main_df = load_sales_data(version=data_version)
+
+# Generate data; cached per content hash of the main dataset together with
+# the full-history summary and annotation positions, none of which depend on
+# the filters below
+data_fingerprint = dataset_fingerprint(data_version, main_df)
+df_competitor, customer_movements, competitors_info = load_competitor_data(data_fingerprint, main_df)
+competitor_summary = load_competitor_summary(data_fingerprint, df_competitor)
+movement_annotations = load_movement_annotations(data_fingerprint, competitor_summary, customer_movements)
 
 # Dashboard header
 st.title("📊 Competitor Analysis")
@@ -171,6 +66,7 @@ if selected_month != 'All':
     selected_month_num = list(month_names.keys())[list(month_names.values()).index(selected_month)]
     mask = mask & (df_competitor['date'].dt.month == selected_month_num)
 df_filtered = df_competitor[mask]
+filtered_summary = summarize_competitors(df_filtered)
 
 # Key Metrics
 st.subheader("Market Overview")
@@ -198,15 +94,28 @@ st.markdown("---")
 
 # Price Trends with Customer Movement Annotations
 st.subheader("Competitor Price Trends and Customer Movements")
-fig_price = px.line(df_competitor, x='date', y='price_per_ton', color='competitor',
+
+# Zooming into a date window re-downsamples that window at full detail
+zoom_col, method_col = st.columns([4, 1])
+with zoom_col:
+    history_start = df_competitor['date'].min().to_pydatetime()
+    history_end = df_competitor['date'].max().to_pydatetime()
+    zoom_window = st.slider('Zoom', min_value=history_start, max_value=history_end,
+                            value=(history_start, history_end), format='YYYY-MM-DD')
+with method_col:
+    downsample_method = st.selectbox('Downsampling', DOWNSAMPLE_METHODS)
+
+price_lines = load_price_lines(data_fingerprint, df_competitor, PRICE_CHART_WIDTH_PX,
+                               downsample_method, window=zoom_window)
+fig_price = px.line(price_lines, x='date', y='price_per_ton', color='competitor',
                     title='Price Evolution with Customer Movements')
 
 # Add annotations for customer movements
-for customer, movement in customer_movements.items():
+for annotation in movement_annotations:
     fig_price.add_annotation(
-        x=movement['date'],
-        y=df_competitor[df_competitor['competitor'] == movement['new_supplier']]['price_per_ton'].mean(),
-        text=f"{customer} → {movement['new_supplier']}",
+        x=annotation['x'],
+        y=annotation['y'],
+        text=annotation['text'],
         showarrow=True,
         arrowhead=1,
         arrowsize=1,
@@ -222,7 +131,7 @@ col1, col2 = st.columns(2)
 with col1:
     # Market Share Analysis
     st.subheader("Market Share Distribution")
-    fig_share = px.pie(df_filtered.groupby('competitor')['market_share'].mean().reset_index(),
+    fig_share = px.pie(filtered_summary,
                        values='market_share', names='competitor',
                        title='Current Market Share Distribution')
     st.plotly_chart(fig_share, use_container_width=True)
@@ -236,7 +145,7 @@ with col1:
 with col2:
     # Service Quality Comparison
     st.subheader("Service Quality Comparison")
-    fig_quality = px.bar(df_filtered.groupby('competitor')['service_quality'].mean().reset_index(),
+    fig_quality = px.bar(filtered_summary,
                         x='competitor', y='service_quality',
                         title='Service Quality Score by Competitor')
     fig_quality.update_layout(yaxis_range=[7, 10])
@@ -1,20 +1,45 @@
 import streamlit as st
-import pickle
 import pandas as pd
-from datetime import datetime
-import re
+
+from dashboard.cube import load_cube
+from dashboard.data import dataset_version, load_sales_data
+from dashboard.intents import INTENT_BACKENDS, load_intent_router
+from dashboard.query import load_query_engine, parse_intent, read_questions
+from dashboard.runner import session_runner, wait_for
     
 # Page config...
 st.set_page_config(page_title="AI Query Analytics", layout="wide")
 
-# Load saved data
-try:
-    with open('data/dashboard_data.pkl', 'rb') as f:
-        data = pickle.load(f)
-        df = data['original_df']
-except:
-    st.error("Error loading data. Please ensure the main dashboard has been run first.")
-    st.stop()
+# Load data from the shared store
+data_version = dataset_version()
+df = load_sales_data(version=data_version)
+engine = load_query_engine(data_version, df, load_cube(data_version, df))
+
+# Questions the pattern table does not recognise can fall back to a model
+# backend; "none" keeps parsing to the patterns alone
+backend_name = st.sidebar.selectbox("Intent model", ["none"] + list(INTENT_BACKENDS))
+router = load_intent_router(backend_name) if backend_name != "none" else None
+
+# Questions run on a background pool so a slow one never freezes the page;
+# typing a new question cancels the one still running
+BATCH_CHUNK = 200
+
+def run_question(job, question):
+    job.report(0.1, "Understanding the question...")
+    intent = router.classify(question) if router else parse_intent(question)
+    job.report(0.6, "Computing the answer...")
+    return engine.answer(intent) if intent else None
+
+# Answer a batch in chunks, publishing the rows answered so far
+def run_batch(job, questions):
+    parts = []
+    for start in range(0, len(questions), BATCH_CHUNK):
+        parts.append(engine.ask_batch(questions[start:start + BATCH_CHUNK],
+                                      router.classify_many if router else None))
+        done = min(start + BATCH_CHUNK, len(questions))
+        job.report(done / len(questions), f"Answered {done:,} of {len(questions):,} questions",
+                   pd.concat(parts, ignore_index=True))
+    return pd.concat(parts, ignore_index=True)
 
 # Page Header
 st.title("🤖 AI-Powered Data Query")
@@ -29,133 +54,11 @@ This demo supports various questions about:
 - Volume (total quantity, monthly, yearly)
 - Customer information (all customers, categories, regions)
 - Performance metrics (top customers, regions)
+- Rankings (e.g. top 5 customers in 2024, top 3 products in Mar 2025)
 
 Try the example queries below or type your own question!
 """)
 
-def parse_month(month_str):
-    month_map = {
-        'jan': 1, 'january': 1,
-        'feb': 2, 'february': 2,
-        'mar': 3, 'march': 3,
-        'apr': 4, 'april': 4,
-        'may': 5,
-        'jun': 6, 'june': 6,
-        'jul': 7, 'july': 7,
-        'aug': 8, 'august': 8,
-        'sep': 9, 'september': 9,
-        'oct': 10, 'october': 10,
-        'nov': 11, 'november': 11,
-        'dec': 12, 'december': 12
-    }
-    return month_map.get(month_str.lower())
-
-# Enhanced query handlers
-def handle_total_revenue(query):
-    if re.search(r'(what|how much|show|tell).*total revenue', query.lower()):
-        total = df['revenue'].sum()
-        return f"💰 Total Revenue: ${total:,.2f}"
-
-def handle_total_quantity(query):
-    if re.search(r'(what|how much|show|tell).*total.*quantity|total.*tons', query.lower()):
-        total = df['quantity_tons'].sum()
-        return f"⚖️ Total Quantity: {total:,.2f} tons"
-
-def handle_revenue_query(query):
-    # Pattern for "revenue for [month] [year]"
-    pattern = r'revenue.*(jan|feb|mar|apr|may|jun|jul|aug|sep|oct|nov|dec)[a-z]* *(20\d\d)' # Very simple yet complicated looking regex.
-    match = re.search(pattern, query.lower())
-    
-    if match:
-        month_str = match.group(1)
-        year = int(match.group(2))
-        month = parse_month(month_str)
-        
-        if month and year:
-            revenue = df[
-                (df['date'].dt.year == year) & 
-                (df['date'].dt.month == month)
-            ]['revenue'].sum()
-            
-            return f"📊 Revenue for {month_str.capitalize()} {year}: ${revenue:,.2f}"
-    
-    # Pattern for "revenue in [year]"
-    year_pattern = r'revenue.*(20\d\d)'
-    year_match = re.search(year_pattern, query.lower())
-    
-    if year_match:
-        year = int(year_match.group(1))
-        revenue = df[df['date'].dt.year == year]['revenue'].sum()
-        return f"📊 Revenue for {year}: ${revenue:,.2f}"
-
-def handle_quantity_period_query(query):
-    # Pattern for "quantity for [month] [year]"
-    pattern = r'quantity.*(jan|feb|mar|apr|may|jun|jul|aug|sep|oct|nov|dec)[a-z]* *(20\d\d)'
-    match = re.search(pattern, query.lower())
-    
-    if match:
-        month_str = match.group(1)
-        year = int(match.group(2))
-        month = parse_month(month_str)
-        
-        if month and year:
-            quantity = df[
-                (df['date'].dt.year == year) & 
-                (df['date'].dt.month == month)
-            ]['quantity_tons'].sum()
-            
-            return f"⚖️ Quantity for {month_str.capitalize()} {year}: {quantity:,.2f} tons"
-    
-    # Pattern for "quantity in [year]"
-    year_pattern = r'quantity.*(20\d\d)'
-    year_match = re.search(year_pattern, query.lower())
-    
-    if year_match:
-        year = int(year_match.group(1))
-        quantity = df[df['date'].dt.year == year]['quantity_tons'].sum()
-        return f"⚖️ Quantity for {year}: {quantity:,.2f} tons"
-
-def handle_list_query(query):
-    if re.search(r'(what|show|list|tell).*all.*customer', query.lower()):
-        customers = sorted(df['customer_name'].unique())
-        return f"👥 All Customers ({len(customers)}):\n" + "\n".join([f"- {c}" for c in customers])
-    
-    if re.search(r'(what|show|list|tell).*all.*categor', query.lower()):
-        categories = sorted(df['customer_category'].unique())
-        return f"📑 All Categories:\n" + "\n".join([f"- {c}" for c in categories])
-    
-    if re.search(r'(what|show|list|tell).*all.*region', query.lower()):
-        regions = sorted(df['region'].unique())
-        return f"🌍 All Regions:\n" + "\n".join([f"- {c}" for c in regions])
-
-def handle_customer_query(query):
-    pattern = r'top customer.*(20\d\d)'
-    match = re.search(pattern, query.lower())
-    
-    if match:
-        year = int(match.group(1))
-        yearly_data = df[df['date'].dt.year == year]
-        top_customer = yearly_data.groupby('customer_name')['revenue'].sum().sort_values(ascending=False).head(1)
-        
-        if not top_customer.empty:
-            customer_name = top_customer.index[0]
-            revenue = top_customer.values[0]
-            return f"🏆 Top customer in {year}: {customer_name} (${revenue:,.2f})"
-
-def handle_region_query(query):
-    pattern = r'region.*highest.*sales.*(20\d\d)'
-    match = re.search(pattern, query.lower())
-    
-    if match:
-        year = int(match.group(1))
-        yearly_data = df[df['date'].dt.year == year]
-        top_region = yearly_data.groupby('region')['revenue'].sum().sort_values(ascending=False).head(1)
-        
-        if not top_region.empty:
-            region_name = top_region.index[0]
-            revenue = top_region.values[0]
-            return f"🌍 Top performing region in {year}: {region_name} (${revenue:,.2f})"
-
 # Initialize session state for the query
 if 'query' not in st.session_state:
     st.session_state.query = ""
@@ -170,22 +73,11 @@ query = st.text_input("Ask your question:",
                      placeholder="e.g., What was the revenue for Mar 2024?")
 
 if query:
-    # Try each query handler
-    handlers = [
-        handle_total_revenue,
-        handle_total_quantity,
-        handle_revenue_query,
-        handle_quantity_period_query,
-        handle_list_query,
-        handle_customer_query,
-        handle_region_query
-    ]
-    
-    response = None
-    for handler in handlers:
-        response = handler(query)
-        if response:
-            break
+    # Parsed into an intent through the compiled dispatch table (or the model
+    # router) and answered from the engine's per-intent cache when anyone
+    # asked it before
+    job = session_runner().submit((data_version, backend_name, query), run_question, query)
+    response = wait_for(job)
     
     if response:
         st.success(response)
@@ -244,11 +136,37 @@ with col3:
         update_query("What are all regions?")
         st.rerun()
 
+# Batch questions, e.g. the standard morning report
+st.markdown("---")
+st.markdown("### Batch questions")
+st.caption("Paste one question per line or upload a .txt file (one per line) or a .csv with a 'question' column.")
+batch_text = st.text_area("Questions", height=150, placeholder="What is the total revenue?\nHow much revenue in 2024?")
+batch_file = st.file_uploader("Upload questions", type=["txt", "csv"])
+
+if st.button("Answer all"):
+    questions = read_questions(batch_text)
+    if batch_file:
+        questions += read_questions(batch_file.getvalue().decode('utf-8'), batch_file.name)
+    st.session_state.batch_questions = questions
+    if not questions:
+        st.info("Enter or upload at least one question.")
+
+# The batch keeps running (and stays visible) across reruns until a new one
+# is submitted
+batch_questions = st.session_state.get('batch_questions')
+if batch_questions:
+    job = session_runner('batch_runner').submit((data_version, backend_name, tuple(batch_questions)),
+                                                run_batch, batch_questions)
+    answers = wait_for(job, lambda partial: st.dataframe(partial, use_container_width=True, hide_index=True))
+    st.dataframe(answers, use_container_width=True, hide_index=True)
+    st.download_button("Download answers (CSV)", answers.to_csv(index=False),
+                       file_name="answers.csv", mime="text/csv")
+
 # Add a note about the demo nature
 st.sidebar.markdown("---")
 st.sidebar.markdown("""
 ### About This Demo
-This is a demonstration of AI-like query capabilities using pattern matching. In a production environment, this would be connected to a real LLM API for more sophisticated natural language understanding.
+This is a demonstration of AI-like query capabilities using pattern matching. Questions the patterns miss can be routed to an intent model (a deterministic mock by default); a local LLM or embedding model can be plugged in with `dashboard.intents.register_backend`. Model calls run on a small worker pool with a timeout, and similar questions reuse cached results.
 
 **Current Capabilities:**
 - Total revenue and quantity queries
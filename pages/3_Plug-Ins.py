@@ -3,10 +3,15 @@ import pandas as pd
 import uuid
 from datetime import datetime
 
+from dashboard.data import dataset_version
+from dashboard.plugin_host import (CPU_SECONDS, MEMORY_MB, PLUGIN_AGGREGATES, TIMEOUT_SECONDS,
+                                   load_plugin_host, plugin_path, save_plugin)
+
 # Page configuration
 st.set_page_config(page_title="Plugin Marketplace", layout="wide")
 
-# Initialize plugin state in session_state (no filesystem access needed)
+# Installed/active flags live in session_state; plugin code itself runs in the
+# shared plugin host
 if "plugin_config" not in st.session_state:
     st.session_state.plugin_config = {
         "installed_plugins": {},
@@ -76,6 +81,58 @@ AVAILABLE_PLUGINS = [
     }
 ]
 
+# Render a plugin result: a DataFrame, or a dict of labelled tables, numbers
+# and text
+def render_plugin_output(result):
+    if isinstance(result, pd.DataFrame):
+        st.dataframe(result, use_container_width=True, hide_index=True)
+    elif isinstance(result, dict):
+        for label, value in result.items():
+            if isinstance(value, pd.DataFrame):
+                st.markdown(f"**{label}**")
+                st.dataframe(value, use_container_width=True, hide_index=True)
+            elif isinstance(value, int):
+                st.metric(label, f"{value:,}")
+            elif isinstance(value, float):
+                st.metric(label, f"{value:,.2f}")
+            else:
+                st.markdown(f"**{label}:** {value}")
+    elif result is not None:
+        st.write(result)
+
+# Start (or look up) the runs of the active plugins; a run key is None for
+# plugins without code
+def plugin_runs(active_plugins, installed_plugins):
+    host = load_plugin_host()
+    data_version = dataset_version()
+    runs = []
+    for plugin_id in active_plugins:
+        info = installed_plugins.get(plugin_id, {})
+        name = info.get("name") or next((p["name"] for p in AVAILABLE_PLUGINS if p["id"] == plugin_id), plugin_id)
+        path = plugin_path(plugin_id, info)
+        runs.append((plugin_id, name, host.submit(plugin_id, path, data_version) if path else None))
+    return runs
+
+# Outputs of the active plugins. Runs happen in the background; while any is
+# still going only this fragment polls for results.
+def plugin_outputs(runs):
+    host = load_plugin_host()
+    for plugin_id, name, run_key in runs:
+        with st.expander(name, expanded=True):
+            if run_key is None:
+                st.caption("This plugin has no code to run.")
+                continue
+            status, value = host.status(run_key)
+            if status == "running":
+                st.info("Running...")
+            elif status == "failed":
+                st.error(value)
+                if st.button("Retry", key=f"retry_{plugin_id}"):
+                    host.forget(run_key)
+                    st.rerun()
+            else:
+                render_plugin_output(value)
+
 # Create tabs for marketplace and management
 tab1, tab2, tab3 = st.tabs(["🏪 Marketplace", "⚙️ Manage Plugins", "🔌 Upload Custom Plugin"])
 
@@ -210,6 +267,16 @@ with tab2:
                 st.success("Deactivated all plugins!")
                 st.rerun()
 
+        # Plugin output
+        st.subheader("Plugin Output")
+        active_plugins = st.session_state.plugin_config["active_plugins"]
+        if active_plugins:
+            runs = plugin_runs(active_plugins, installed_plugins)
+            running = any(k and load_plugin_host().status(k)[0] == "running" for _, _, k in runs)
+            st.fragment(plugin_outputs, run_every=1 if running else None)(runs)
+        else:
+            st.info("Activate a plugin to see its output.")
+
 with tab3:
     st.subheader("Upload Custom Plugin")
     
@@ -225,7 +292,7 @@ with tab3:
     - Add new visualizations
     - Connect to external data sources
     - Add custom exports
-    - Extend the dashboard UI
+    - Show tables, metrics and text under Plugin Output
     """)
     
     uploaded_file = st.file_uploader("Upload Python Plugin (.py file)", type=["py"])
@@ -236,10 +303,11 @@ with tab3:
     
     if uploaded_file and plugin_name and plugin_description and plugin_category:
         if st.button("Submit Plugin"):
-            # For demo purposes, just pretend we've installed it
             plugin_id = f"custom_{uuid.uuid4().hex[:8]}"
+            path = save_plugin(plugin_id, uploaded_file.getvalue())
             
             st.session_state.plugin_config["installed_plugins"][plugin_id] = {
+                "path": path,
                 "version": "1.0.0",
                 "installed_at": datetime.now().strftime("%Y-%m-%d"),
                 "custom": True,
@@ -249,7 +317,7 @@ with tab3:
             }
                 
             st.success(f"Plugin '{plugin_name}' uploaded and installed successfully!")
-            st.info("Note: In a production environment, custom plugins would undergo security review before installation.")
+            st.info("Note: Custom plugins run in a separate, resource-limited process, but in a production environment they would still undergo security review before installation.")
     else:
         st.info("Please fill in all fields to upload a custom plugin.")
 
@@ -260,28 +328,39 @@ st.markdown("""
 Want to create your own plugins? Check out our developer documentation to learn how to build
 custom plugins that integrate with our dashboard.
 
-Plugins can be developed using Python and should implement our plugin interface:
+Plugins can be developed using Python and should implement our plugin interface.
+`run()` executes in a separate worker process. Declare the shared aggregates and order columns
+the plugin needs in `requires`; the dashboard computes each aggregate once per data version for
+all plugins and passes them to `run()` as a dict of DataFrames (the columns arrive as `orders`).
+Without `requires`, `run()` receives the full order history. Return a DataFrame or a dict of
+labelled tables, numbers and text for the dashboard to display under Plugin Output. Plugin code
+never runs in the dashboard process, so plugins cannot build Streamlit UI themselves: the
+`get_ui()` hook of earlier versions of this interface is no longer called.
 
 ```python
 class ExamplePlugin:
+    requires = {{"aggregates": ["monthly_totals"], "columns": ["date", "revenue"]}}
+
     def __init__(self):
         self.name = "Example Plugin"
         self.version = "1.0.0"
         
-    def run(self, dashboard_data):
+    def run(self, inputs):
         # Plugin logic here
-        pass
-        
-    def get_ui(self):
-        # Return a Streamlit UI component
-        return st.container()
+        return {{"Months analysed": len(inputs["monthly_totals"])}}
 ```
 
+Available aggregates: {aggregates}.
+
+Each run is limited to {cpu} CPU seconds, {memory} MB of memory and {timeout} seconds overall.
+Results are cached until the plugin or the data changes.
+
 **Resources:**
 - [Plugin Development Documentation](#)
 - [Plugin API Reference](#)
 - [Example Plugins Repository](#)
-""")
+""".format(cpu=CPU_SECONDS, memory=MEMORY_MB, timeout=TIMEOUT_SECONDS,
+           aggregates=", ".join(f"`{name}`" for name in PLUGIN_AGGREGATES)))
 
 # Add a note about the demo nature
 st.sidebar.markdown("---")
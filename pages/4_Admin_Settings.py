@@ -6,6 +6,11 @@ import pickle
 import os
 import uuid
 
+from dashboard.alerts import DEFAULT_THRESHOLD, DEFAULT_WINDOW_MONTHS, current_alerts
+from dashboard.data import dataset_version, load_sales_data
+from dashboard.ingest import ingest_orders
+from dashboard.schema import memory_report
+
 # Page configuration
 st.set_page_config(page_title="Admin Settings", layout="wide")
 
@@ -113,6 +118,30 @@ else:
                                      datetime.now() + timedelta(days=7))
         if st.button("Update Schedule"):
             st.success(f"Data refresh scheduled for {refresh_date}")
+        
+        # Append new orders to the stored dataset without regenerating history
+        st.subheader("Ingest New Orders")
+        orders_file = st.file_uploader("Upload new orders (CSV)", type=["csv"])
+        if orders_file and st.button("Ingest Orders"):
+            try:
+                new_orders = pd.read_csv(orders_file)
+                revision = ingest_orders(new_orders, dataset_version()[0])
+            except ValueError as e:  # includes unreadable or malformed CSV files
+                st.error(str(e))
+            else:
+                st.success(f"Ingested {len(new_orders):,} orders (data revision {revision})")
+                # Re-check the alert rules against the new revision
+                new_version = dataset_version()
+                alerts = current_alerts(new_version, lambda: load_sales_data(version=new_version))
+                if len(alerts):
+                    st.warning(f"🔔 {len(alerts)} revenue alerts after this batch")
+                    st.dataframe(alerts, use_container_width=True, hide_index=True)
+        
+        # Resident size of the shared sales frame
+        with st.expander("Data Memory Footprint"):
+            report = memory_report(load_sales_data())
+            st.write(f"Sales frame: {report['bytes'].sum() / 2**20:,.2f} MB")
+            st.dataframe(report, use_container_width=True)
         st.markdown('</div>', unsafe_allow_html=True)
     
     with tab2:
@@ -216,7 +245,15 @@ else:
         # Notification settings
         st.subheader("Notifications")
         email_reports = st.checkbox("Send weekly email reports", value=True)
-        alert_threshold = st.slider("Alert Threshold (%)", 0, 100, 20)
+        # Revenue-drop alerts (Custom Notifications) read these for the session
+        alert_settings = st.session_state.get('alert_settings', {})
+        alert_threshold = st.slider("Alert Threshold (%)", 0, 100,
+                                    alert_settings.get('threshold', DEFAULT_THRESHOLD),
+                                    help="Alert when a customer's or region's revenue over the alert window "
+                                         "falls by at least this much compared with the window before")
+        alert_window = st.number_input("Alert Window (months)", 1, 24,
+                                       alert_settings.get('window', DEFAULT_WINDOW_MONTHS))
+        st.session_state.alert_settings = {'threshold': alert_threshold, 'window': int(alert_window)}
         
         # Data retention policy
         st.subheader("Data Retention")